@@ -0,0 +1,105 @@
+"""
+Production entry point.
+
+    python -m app [--workers N] [--host H] [--port P]
+
+A supervisor process starts WEB_CONCURRENCY workers (default: one per
+available CPU, honouring affinity and cgroup CPU quotas). Each worker binds
+its own SO_REUSEPORT socket and runs DrainingServer with uvloop and
+httptools when they are installed. Workers that exit - recycled after
+WORKER_MAX_REQUESTS (+ jitter) requests, over WORKER_MEMORY_LIMIT_MB, or
+crashed - are replaced. SIGTERM/SIGINT drain and stop all workers.
+"""
+
+import argparse
+import glob
+import importlib.util
+import math
+import os
+import socket
+import sys
+
+from uvicorn.config import HTTPProtocolType, LoopSetupType
+
+from app.config import settings
+from app.server import Supervisor
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by a cgroup v2 quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def event_loop_choice() -> LoopSetupType:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_choice() -> HTTPProtocolType:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def _wipe_multiproc_dir():
+    """Metric files from a previous run would otherwise be summed in."""
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        for path in glob.glob(os.path.join(settings.PROMETHEUS_MULTIPROC_DIR, "*.db")):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the mdz API server")
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    args = parser.parse_args()
+
+    if not hasattr(socket, "SO_REUSEPORT"):
+        sys.exit("SO_REUSEPORT is not available on this platform")
+
+    _wipe_multiproc_dir()
+
+    # After the wipe: importing logging registers this process's metric files
+    from app.core.logging import configure_logging, logger
+
+    configure_logging()
+
+    cpus = available_cpus()
+    workers = args.workers or cpus
+    loop, http = event_loop_choice(), http_choice()
+    logger.info(
+        "server_config",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        available_cpus=cpus,
+        loop=loop,
+        http=http,
+        reuseport=True,
+        backlog=settings.SERVER_BACKLOG,
+        max_requests=settings.WORKER_MAX_REQUESTS or None,
+        max_requests_jitter=settings.WORKER_MAX_REQUESTS_JITTER,
+        memory_limit_mb=settings.WORKER_MEMORY_LIMIT_MB or None,
+        multiprocess_metrics=bool(settings.PROMETHEUS_MULTIPROC_DIR),
+        python=sys.version.split()[0],
+    )
+    if workers > 1 and not settings.PROMETHEUS_MULTIPROC_DIR:
+        logger.warning(
+            "metrics_per_worker",
+            message="Set PROMETHEUS_MULTIPROC_DIR to aggregate /metrics across workers",
+        )
+
+    Supervisor(workers, args.host, args.port, loop, http).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,36 @@
 Authentication endpoints with Redis integration.
 """
 
+from typing import Any
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.revocation import revocation_list
+from app.core.security import (
+    verify_password,
+    get_password_hash,
+    create_access_token,
+    invalidate_cached_token,
+)
+from app.dependencies import (
+    bearer_scheme,
+    get_current_superuser,
+    get_current_user,
+    get_token_payload,
+)
 from app.models.user import User
-from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse
+from app.schemas.auth import (
+    BulkRegisterResponse,
+    BulkUserCreate,
+    UserCreate,
+    UserLogin,
+    Token,
+    UserResponse,
+)
 from app.core.logging import logger
 from app.core.monitoring import auth_attempts_total
 from app.core.cache import cache  # <-- Redis
@@ -16,6 +39,29 @@ from app.core.cache import cache  # <-- Redis
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+# Sync DB work (and bcrypt) runs in the thread pool, as for register_bulk:
+# a pool checkout that waits must block a worker thread, not the event loop.
+
+
+def _create_user(db: Session, email: str, password: str) -> User | None:
+    """Insert a user; None if the email is already registered."""
+    if db.query(User).filter(User.email == email).first():
+        return None
+    user = User(email=email, hashed_password=get_password_hash(password))
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def _authenticate(db: Session, email: str, password: str) -> User | None:
+    """The user with this email and password, else None."""
+    user = db.query(User).filter(User.email == email).first()
+    if user is None or not verify_password(password, user.hashed_password):
+        return None
+    return user
+
+
 # -----------------------------
 # REGISTER
 # -----------------------------
@@ -25,20 +71,15 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
 
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+    new_user = await run_in_threadpool(
+        _create_user, db, user_data.email, user_data.password
+    )
+    if new_user is None:
         auth_attempts_total.labels(status="failed_duplicate").inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(email=user_data.email, hashed_password=hashed_password)
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-
     auth_attempts_total.labels(status="registered").inc()
     logger.info("user_registered", user_id=new_user.id, email=new_user.email)
 
@@ -50,6 +91,40 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     return new_user
 
 
+# -----------------------------
+# BULK REGISTER
+# -----------------------------
+@router.post("/register/bulk", response_model=BulkRegisterResponse)
+async def register_bulk(
+    payload: BulkUserCreate,
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_superuser),
+):
+    """Register many users at once, reporting status per row."""
+    # Rarely used; loaded on first call rather than with the app
+    from app.services.provisioning import cache_registrations, provision_users
+
+    results = await run_in_threadpool(
+        provision_users, db, [row.model_dump() for row in payload.users]
+    )
+    await cache_registrations(results)
+
+    counts = {"created": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result.status] += 1
+
+    auth_attempts_total.labels(status="registered").inc(counts["created"])
+    auth_attempts_total.labels(status="failed_duplicate").inc(counts["duplicate"])
+    logger.info("users_bulk_registered", admin_id=admin.id, **counts)
+
+    return BulkRegisterResponse(
+        created=counts["created"],
+        duplicates=counts["duplicate"],
+        invalid=counts["invalid"],
+        results=results,
+    )
+
+
 # -----------------------------
 # LOGIN
 # -----------------------------
@@ -57,14 +132,16 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """Login and receive JWT access token."""
 
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await run_in_threadpool(
+        _authenticate, db, credentials.email, credentials.password
+    )
 
     # Track login attempts in Redis
     await cache.set(
         f"auth:login_attempt:{credentials.email}", {"attempt": "login"}, expire=300
     )
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if user is None:
         auth_attempts_total.labels(status="failed_invalid").inc()
 
         # Increment failed attempts counter
@@ -98,3 +175,32 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     logger.info("user_logged_in", user_id=user.id, email=user.email)
 
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+# -----------------------------
+# LOGOUT
+# -----------------------------
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    payload: dict[str, Any] = Depends(get_token_payload),
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+):
+    """Revoke the presented access token."""
+
+    jti = payload.get("jti")
+    if jti:
+        await revocation_list.revoke(jti, payload["exp"])
+    invalidate_cached_token(credentials.credentials)
+
+    await cache.delete(f"auth:session:{payload['sub']}")
+
+    logger.info("user_logged_out", user_id=payload["sub"], jti=jti)
+
+
+# -----------------------------
+# CURRENT USER
+# -----------------------------
+@router.get("/me", response_model=UserResponse)
+async def me(user: User = Depends(get_current_user)):
+    """Return the authenticated user."""
+    return user
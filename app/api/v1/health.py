@@ -2,13 +2,11 @@
 Health check and readiness endpoints.
 """
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from fastapi import APIRouter
 from datetime import datetime
 
-from app.core.database import get_db
-from app.core.cache import cache
+from app.core.probes import readiness
+from app.core.warmup import warmup
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -20,40 +18,20 @@ async def health_check():
 
 
 @router.get("/readiness", response_model=dict)
-async def readiness_check(db: Session = Depends(get_db)):
+async def readiness_check():
     """
     Readiness check - verifies all dependencies.
 
-    Checks:
-    - Database connectivity
-    - Redis connectivity
+    Checks (concurrently, each bounded by READINESS_TIMEOUT_SECONDS):
+    - Database connectivity (SELECT 1)
+    - Redis connectivity (PING)
+
+    Reports not_ready while startup warm-up is running. The result is cached
+    for READINESS_CACHE_TTL_SECONDS; `checks.timestamp` is when it was taken.
     """
-    checks = {
-        "database": False,
-        "cache": False,
-        "timestamp": datetime.utcnow().isoformat(),
-    }
-
-    # -------------------------
-    # Database check
-    # -------------------------
-    try:
-        db.execute(text("SELECT 1"))
-        checks["database"] = True
-    except Exception as e:
-        checks["database_error"] = str(e)
-
-    # -------------------------
-    # Redis check
-    # -------------------------
-    try:
-        key = "health:readiness"
-        await cache.set(key, {"status": "ok"}, expire=10)
-        result = await cache.get(key)
-        checks["cache"] = result == {"status": "ok"}
-    except Exception as e:
-        checks["cache_error"] = str(e)
-
-    overall_healthy = checks["database"] and checks["cache"]
-
-    return {"status": "ready" if overall_healthy else "not_ready", "checks": checks}
+    if warmup.pending:
+        return {
+            "status": "not_ready",
+            "checks": {"warmup": False, "timestamp": datetime.utcnow().isoformat()},
+        }
+    return await readiness.check()
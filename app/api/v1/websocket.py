@@ -1,8 +1,22 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
 from datetime import datetime, timezone
+from typing import cast
+import asyncio
+import json
 import structlog
+from app.config import settings
+from app.core.loop_monitor import loop_watchdog
+from app.core.monitoring import ws_limit_disconnects_total
 from app.core.security import decode_access_token
 from app.websocket import manager, router
+from app.websocket.limits import (
+    FRAME_TOO_LARGE,
+    INVALID_JSON,
+    RATE_LIMITED,
+    TOO_MANY_INFLIGHT,
+    InboundLimiter,
+)
+from app.websocket.metered import MeteredWebSocket
 
 logger = structlog.get_logger()
 
@@ -13,6 +27,10 @@ ws_router = APIRouter()
 async def websocket_endpoint(
     websocket: WebSocket, token: str = Query(...)
 ):
+    if manager.draining:
+        await websocket.close(code=status.WS_1012_SERVICE_RESTART)
+        return
+
     payload = decode_access_token(token)
 
     if not payload:
@@ -21,6 +39,8 @@ async def websocket_endpoint(
 
     user_id = int(payload.get("sub"))
     session_id = f"ws_{user_id}_{datetime.now(timezone.utc).timestamp()}"
+    # A duck-typed proxy: everything downstream uses it as the WebSocket
+    websocket = cast(WebSocket, MeteredWebSocket(websocket))
 
     await manager.connect(websocket, session_id, user_id)
 
@@ -33,19 +53,93 @@ async def websocket_endpoint(
         }
     )
 
+    limiter = InboundLimiter()
+    # Messages are handled one at a time, in the order they arrived
+    queue: asyncio.Queue = asyncio.Queue()
+    pending = 0  # Queued plus the one being handled
+
+    async def consume():
+        nonlocal pending
+        while True:
+            data = await queue.get()
+            try:
+                loop_watchdog.track(websocket.scope)
+                with manager.handling(session_id):
+                    await router.route(data, websocket, session_id, user_id)
+            except Exception as e:
+                logger.error(
+                    "websocket_handler_error", session_id=session_id, error=str(e)
+                )
+            finally:
+                pending -= 1
+
+    consumer = asyncio.create_task(consume())
+
+    async def reject(reason: str, error: str, request_id: str | None = None):
+        await router.send_error(websocket, reason, error, request_id)
+        if limiter.violation(reason):
+            ws_limit_disconnects_total.inc()
+            logger.warning(
+                "websocket_limit_disconnect", session_id=session_id, user_id=user_id
+            )
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            raise WebSocketDisconnect(status.WS_1008_POLICY_VIOLATION)
+
     try:
         while True:
-            data = await websocket.receive_json()
-            await router.route(data, websocket, session_id, user_id)
+            text = await websocket.receive_text()
+            manager.touch(session_id)
+
+            # len() counts characters; bytes are at least as many
+            if len(text) > settings.WS_MAX_FRAME_BYTES:
+                await reject(
+                    FRAME_TOO_LARGE,
+                    f"Frame exceeds {settings.WS_MAX_FRAME_BYTES} bytes",
+                )
+                continue
+            try:
+                data = json.loads(text)
+            except ValueError:
+                await reject(INVALID_JSON, "Message is not valid JSON")
+                continue
+            if not isinstance(data, dict):
+                await reject(INVALID_JSON, "Message must be a JSON object")
+                continue
+
+            message_type = data.get("type")
+            request_id = data.get("request_id")
+            bucket = (
+                message_type
+                if isinstance(message_type, str) and message_type in router.handlers
+                else "unknown"
+            )
+            if not limiter.allow(bucket):
+                await reject(
+                    RATE_LIMITED, f"Too many {message_type} messages", request_id
+                )
+                continue
+            if pending >= settings.WS_MAX_INFLIGHT_PER_CONNECTION:
+                await reject(
+                    TOO_MANY_INFLIGHT,
+                    "Too many requests in flight on this connection",
+                    request_id,
+                )
+                continue
+
+            pending += 1
+            queue.put_nowait(data)
 
     except WebSocketDisconnect:
-        await manager.disconnect(session_id, user_id)
+        await manager.disconnect(session_id)
         logger.info("client_disconnected", session_id=session_id)
 
     except Exception as e:
         logger.error("websocket_error", session_id=session_id, error=str(e))
-        await manager.disconnect(session_id, user_id)
+        await manager.disconnect(session_id)
         try:
             await websocket.close()
         except Exception:
             pass
+
+    finally:
+        consumer.cancel()
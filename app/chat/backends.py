@@ -0,0 +1,56 @@
+"""
+Model backends for chat replies (CHAT_BACKEND).
+
+A backend takes one batch of prompts for a single model and returns one
+reply per prompt, in order:
+
+    async def generate_batch(self, model: str, prompts: list[Prompt]) -> list[str]
+
+"echo" answers immediately with a description of the prompt. "fake" gives
+the same answers after a fixed per-batch cost plus a per-prompt cost, one
+batch at a time, like a single-accelerator model server; it is meant for
+tests and benchmarks.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import List, NamedTuple
+
+
+class Prompt(NamedTuple):
+    content: str
+    context: dict
+
+
+def echo_reply(prompt: Prompt) -> str:
+    content, context = prompt
+    return f"Context: {context}, \nContext items: {len(context)}\nMessage: {content} "
+
+
+class EchoBackend:
+    async def generate_batch(self, model: str, prompts: List[Prompt]) -> List[str]:
+        return [echo_reply(prompt) for prompt in prompts]
+
+
+class FakeBackend:
+    """
+    Echo replies from a simulated accelerator that runs one batch at a time,
+    each costing `batch_seconds + item_seconds * len(batch)`.
+    """
+
+    def __init__(self, batch_seconds: float, item_seconds: float):
+        self.batch_seconds = batch_seconds
+        self.item_seconds = item_seconds
+        self.batches: deque = deque(maxlen=10_000)  # Sizes of recent batches
+        self._busy_until = 0.0
+
+    async def generate_batch(self, model: str, prompts: List[Prompt]) -> List[str]:
+        self.batches.append(len(prompts))
+        now = time.monotonic()
+        # Queue behind batches already running on the device
+        self._busy_until = max(now, self._busy_until) + (
+            self.batch_seconds + self.item_seconds * len(prompts)
+        )
+        await asyncio.sleep(self._busy_until - now)
+        return [echo_reply(prompt) for prompt in prompts]
@@ -0,0 +1,146 @@
+"""
+Cross-session micro-batching of chat requests.
+
+Every chat.message on a worker is submitted to one BatchScheduler. Requests
+for the same model queue together until the batch holds `max_batch_size`
+requests or its first request has waited `max_wait` seconds. Due batches go
+to the backend in their own tasks, at most `max_concurrency` at a time;
+while the backend is busy they keep filling, which is what lets batching
+raise throughput under load. Each reply resolves the future its submitter
+awaits, which sends it on the originating socket.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Tuple
+
+import structlog
+
+from app.chat.backends import EchoBackend, FakeBackend, Prompt
+from app.config import settings
+from app.core.monitoring import (
+    chat_batch_duration_seconds,
+    chat_batch_size,
+    chat_batch_wait_seconds,
+    chat_batches_total,
+)
+
+logger = structlog.get_logger()
+
+# (prompt, future for its reply, time it was queued)
+_Item = Tuple[Prompt, asyncio.Future, float]
+
+
+class BatchScheduler:
+    def __init__(
+        self, backend, max_batch_size: int, max_wait: float, max_concurrency: int
+    ):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrency = max_concurrency
+        self._pending: Dict[str, List[_Item]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # Models whose batch is due, oldest first, with what made it due
+        self._ready: Dict[str, str] = {}
+        self._dispatching: set[asyncio.Task] = set()
+
+    async def submit(self, model: str, content: str, context: dict) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(model, [])
+        batch.append((Prompt(content, context), future, time.monotonic()))
+
+        if len(batch) >= self.max_batch_size:
+            self._mark_ready(model, "size")
+        elif len(batch) == 1 and model not in self._ready:
+            self._timers[model] = loop.call_later(
+                self.max_wait, self._mark_ready, model, "timeout"
+            )
+        return await future
+
+    def _mark_ready(self, model: str, trigger: str):
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        self._ready.setdefault(model, trigger)
+        self._dispatch_ready()
+
+    def _dispatch_ready(self):
+        # While the backend is busy, due batches stay queued and keep filling
+        while self._ready and len(self._dispatching) < self.max_concurrency:
+            model, trigger = next(iter(self._ready.items()))
+            del self._ready[model]
+            pending = self._pending.pop(model, None)
+            if not pending:
+                continue
+            batch = pending[: self.max_batch_size]
+            rest = pending[self.max_batch_size:]
+            if rest:
+                # Already waited for a free slot; next in line after other models
+                self._pending[model] = rest
+                self._ready[model] = "backlog"
+
+            chat_batches_total.labels(trigger=trigger).inc()
+            task = asyncio.get_running_loop().create_task(
+                self._dispatch(model, batch)
+            )
+            self._dispatching.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task):
+        self._dispatching.discard(task)
+        self._dispatch_ready()
+
+    async def _dispatch(self, model: str, batch: List[_Item]):
+        start = time.monotonic()
+        for _, _, queued_at in batch:
+            chat_batch_wait_seconds.observe(start - queued_at)
+        chat_batch_size.observe(len(batch))
+
+        try:
+            replies = await self.backend.generate_batch(
+                model, [prompt for prompt, _, _ in batch]
+            )
+            if len(replies) != len(batch):
+                raise RuntimeError(
+                    f"backend returned {len(replies)} replies for {len(batch)} prompts"
+                )
+        except Exception as e:
+            logger.error(
+                "chat_batch_failed", model=model, size=len(batch), error=str(e)
+            )
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            chat_batch_duration_seconds.observe(time.monotonic() - start)
+
+        for (_, future, _), reply in zip(batch, replies):
+            # Submitters that went away have cancelled their futures
+            if not future.done():
+                future.set_result(reply)
+
+    async def close(self):
+        """Send whatever is queued and wait until every batch has finished."""
+        for model in list(self._pending):
+            self._mark_ready(model, "shutdown")
+        while self._dispatching:
+            await asyncio.gather(*self._dispatching, return_exceptions=True)
+
+
+def _backend_from_settings():
+    if settings.CHAT_BACKEND == "fake":
+        return FakeBackend(
+            settings.CHAT_FAKE_BATCH_SECONDS, settings.CHAT_FAKE_ITEM_SECONDS
+        )
+    return EchoBackend()
+
+
+batcher = BatchScheduler(
+    _backend_from_settings(),
+    settings.CHAT_BATCH_MAX_SIZE,
+    settings.CHAT_BATCH_MAX_WAIT_SECONDS,
+    settings.CHAT_BATCH_MAX_CONCURRENCY,
+)
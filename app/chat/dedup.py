@@ -0,0 +1,62 @@
+"""
+Idempotent chat requests.
+
+Clients retry chat.message with the same request_id after a timeout. The
+deduplicator keys work by (user_id, request_id): a retry while the first
+attempt is still running awaits that attempt, and a retry after it finished
+gets the stored result for `ttl` seconds. The work runs in its own task, so
+it completes (and is stored) even if the connection that started it closes.
+"""
+
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.config import settings
+from app.core.ttl_cache import TTLCache
+
+_MISSING = object()
+
+
+class RequestDeduplicator:
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self._done = TTLCache(maxsize=maxsize)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, str]:
+        """
+        Result of `compute()` for `key`, and how it was obtained: "computed",
+        "attached" or "replayed". Failures are not stored, so a retry after
+        one runs again.
+        """
+        result = self._done.get(key, _MISSING)
+        if result is not _MISSING:
+            return result, "replayed"
+
+        task = self._inflight.get(key)
+        outcome = "attached"
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._finish, key))
+            outcome = "computed"
+        # Shielded so a caller going away doesn't cancel work others await
+        return await asyncio.shield(task), outcome
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # exception() also marks a failure as retrieved when nobody awaits it
+        if not task.cancelled() and task.exception() is None:
+            self._done.set(key, task.result(), time.monotonic() + self.ttl)
+
+    def clear(self):
+        self._done.clear()
+
+
+deduplicator = RequestDeduplicator(
+    settings.CHAT_DEDUP_TTL_SECONDS, settings.CHAT_DEDUP_MAX_ENTRIES
+)
@@ -0,0 +1,180 @@
+"""
+Fair scheduling and admission control for chat generation.
+
+At most `max_concurrency` requests generate at once on a worker. Requests
+beyond that wait in per-user queues and are served by start-time fair
+queuing: each request is tagged `max(V, user's last tag) + 1 / weight`,
+where V is the tag of the request served last, and the lowest tag goes
+next. With equal weights ("round_robin") users simply take turns, however
+many requests or editor windows each has queued; "weighted" takes weights
+from the user's class (CHAT_USER_CLASSES / CHAT_CLASS_WEIGHTS).
+
+A request that would push its user past `max_queued_per_user`, or the
+worker past `max_queued`, fails fast with ChatBusy carrying an estimate of
+the wait instead of joining the queue.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, TypeVar
+
+from app.config import settings
+from app.core.monitoring import (
+    chat_busy_rejections_total,
+    chat_queue_depth,
+    chat_queue_wait_seconds,
+    chat_running,
+)
+
+T = TypeVar("T")
+
+DEFAULT_CLASS = "default"
+# Service time assumed until the first request completes
+_INITIAL_SERVICE_SECONDS = 0.5
+_SERVICE_EWMA_ALPHA = 0.2
+
+
+class ChatBusy(Exception):
+    """Queues are full; retry after roughly `retry_after` seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Chat queues are full; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def user_class(user_id: int) -> str:
+    return settings.CHAT_USER_CLASSES.get(user_id, DEFAULT_CLASS)
+
+
+class _Waiter:
+    __slots__ = ("tag", "seq", "user_id", "user_class", "future", "queued_at")
+
+    def __init__(self, tag, seq, user_id, user_class, future):
+        self.tag = tag
+        self.seq = seq
+        self.user_id = user_id
+        self.user_class = user_class
+        self.future = future
+        self.queued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.tag, self.seq) < (other.tag, other.seq)
+
+
+class FairScheduler:
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queued_per_user: int,
+        max_queued: int,
+        weighted: bool,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queued_per_user = max_queued_per_user
+        self.max_queued = max_queued
+        self.weighted = weighted
+        self.running = 0
+        self._heap: List[_Waiter] = []
+        self._queued: Dict[int, int] = {}  # user_id -> waiting requests
+        self._queued_total = 0
+        self._last_tag: Dict[int, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._service_seconds = _INITIAL_SERVICE_SECONDS
+
+    def estimated_wait(self) -> float:
+        """Rough time until a request queued now would start."""
+        rounds = math.ceil((self._queued_total + 1) / self.max_concurrency)
+        return round(rounds * self._service_seconds, 3)
+
+    async def run(self, user_id: int, work: Callable[[], Awaitable[T]]) -> T:
+        """Run `work()` once a slot is free and it is this user's turn."""
+        await self._acquire(user_id)
+        start = time.monotonic()
+        try:
+            return await work()
+        finally:
+            self._service_seconds += _SERVICE_EWMA_ALPHA * (
+                time.monotonic() - start - self._service_seconds
+            )
+            self._release()
+
+    async def _acquire(self, user_id: int):
+        cls = user_class(user_id)
+        if self.running < self.max_concurrency and not self._queued_total:
+            self._heap.clear()  # Only cancelled waiters can be left in it
+            self.running += 1
+            chat_running.inc()
+            chat_queue_wait_seconds.labels(user_class=cls).observe(0)
+            return
+
+        depth = self._queued.get(user_id, 0)
+        if (
+            depth >= self.max_queued_per_user
+            or self._queued_total >= self.max_queued
+        ):
+            chat_busy_rejections_total.labels(user_class=cls).inc()
+            raise ChatBusy(self.estimated_wait())
+
+        weight = settings.CHAT_CLASS_WEIGHTS.get(cls, 1.0) if self.weighted else 1.0
+        tag = max(self._virtual_time, self._last_tag.get(user_id, 0.0)) + 1 / weight
+        self._last_tag[user_id] = tag
+        waiter = _Waiter(
+            tag,
+            next(self._seq),
+            user_id,
+            cls,
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._heap, waiter)
+        self._queued[user_id] = depth + 1
+        self._queued_total += 1
+        chat_queue_depth.labels(user_class=cls).inc()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release()  # Handed a slot just as we were cancelled
+            else:
+                waiter.future.cancel()
+                self._dequeued(waiter)  # Left in the heap; skipped when popped
+            raise
+
+    def _release(self):
+        while self._heap:
+            waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                continue  # Cancelled while waiting
+            self._virtual_time = waiter.tag
+            self._dequeued(waiter)
+            chat_queue_wait_seconds.labels(user_class=waiter.user_class).observe(
+                time.monotonic() - waiter.queued_at
+            )
+            # The slot passes straight to the next request
+            waiter.future.set_result(None)
+            return
+        self.running -= 1
+        chat_running.dec()
+
+    def _dequeued(self, waiter: _Waiter):
+        self._queued_total -= 1
+        chat_queue_depth.labels(user_class=waiter.user_class).dec()
+        remaining = self._queued[waiter.user_id] - 1
+        if remaining:
+            self._queued[waiter.user_id] = remaining
+        else:
+            # An idle user starts again from the current virtual time
+            del self._queued[waiter.user_id]
+            self._last_tag.pop(waiter.user_id, None)
+
+
+fair_scheduler = FairScheduler(
+    settings.CHAT_MAX_CONCURRENCY,
+    settings.CHAT_MAX_QUEUED_PER_USER,
+    settings.CHAT_MAX_QUEUED,
+    weighted=settings.CHAT_FAIRNESS_POLICY == "weighted",
+)
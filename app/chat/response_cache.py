@@ -0,0 +1,68 @@
+"""
+Opt-in response cache shared across users (CHAT_RESPONSE_CACHE_ENABLED).
+
+Keyed by a digest of model, content and context, so identical prompts are
+answered once per `ttl`. Only enable it for deterministic backends whose
+answers depend on nothing but those three inputs.
+"""
+
+import hashlib
+import json
+import time
+from typing import Optional
+
+from app.config import settings
+from app.core.monitoring import (
+    chat_response_cache_entries,
+    chat_response_cache_lookups_total,
+)
+from app.core.ttl_cache import TTLCache
+
+_hits = chat_response_cache_lookups_total.labels(result="hit")
+_misses = chat_response_cache_lookups_total.labels(result="miss")
+
+
+def prompt_key(model: str, content: str, context: dict) -> str:
+    payload = json.dumps(
+        [model, content, context], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, maxsize: int, enabled: bool):
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = TTLCache(maxsize=maxsize)
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        content = self._entries.get(key)
+        if content is None:
+            _misses.inc()
+            # The lookup may have dropped an expired entry
+            chat_response_cache_entries.set(len(self._entries))
+        else:
+            _hits.inc()
+        return content
+
+    def set(self, key: str, content: str):
+        if not self.enabled:
+            return
+        # Misses end here after generating, so the scan is cheap by comparison;
+        # it keeps the gauge to live entries, not ones waiting for a lookup
+        self._entries.purge_expired()
+        self._entries.set(key, content, time.monotonic() + self.ttl)
+        chat_response_cache_entries.set(len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        chat_response_cache_entries.set(0)
+
+
+response_cache = ResponseCache(
+    settings.CHAT_RESPONSE_CACHE_TTL_SECONDS,
+    settings.CHAT_RESPONSE_CACHE_MAX_ENTRIES,
+    settings.CHAT_RESPONSE_CACHE_ENABLED,
+)
@@ -0,0 +1,48 @@
+"""
+chat.message processing: request dedup, the shared response cache, then
+generation (fair-scheduled per user, batched per model).
+"""
+
+from typing import Optional
+
+from app.chat.batching import batcher
+from app.chat.dedup import deduplicator
+from app.chat.fairness import fair_scheduler
+from app.chat.response_cache import prompt_key, response_cache
+from app.core.monitoring import chat_requests_total
+
+
+async def generate(model: str, content: str, context: dict) -> str:
+    """Reply text for one prompt, batched with other sessions' requests."""
+    return await batcher.submit(model, content, context)
+
+
+async def _answer(user_id: int, model: str, content: str, context: dict) -> str:
+    key = prompt_key(model, content, context)
+    reply = response_cache.get(key)
+    if reply is None:
+        # Only generation takes a fair-share slot; cache hits and replays don't
+        reply = await fair_scheduler.run(
+            user_id, lambda: generate(model, content, context)
+        )
+        response_cache.set(key, reply)
+    return reply
+
+
+async def complete(
+    user_id: int,
+    request_id: Optional[str],
+    model: str,
+    content: str,
+    context: dict,
+) -> str:
+    """Reply text for a chat.message; retries of a request_id share one answer."""
+    if request_id is None:
+        chat_requests_total.labels(outcome="computed").inc()
+        return await _answer(user_id, model, content, context)
+
+    reply, outcome = await deduplicator.run(
+        (user_id, request_id), lambda: _answer(user_id, model, content, context)
+    )
+    chat_requests_total.labels(outcome=outcome).inc()
+    return reply
@@ -4,7 +4,7 @@ Loads from environment variables with .env file support.
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from pydantic import Field, field_validator
 from typing import Literal
 
 
@@ -24,10 +24,24 @@ class Settings(BaseSettings):
     # API
     API_V1_PREFIX: str = "/api/v1"
 
+    # Server (`python -m app`)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_BACKLOG: int = 2048
+    WEB_CONCURRENCY: int = 0  # Worker processes; 0 = one per available CPU
+    WORKER_MAX_REQUESTS: int = 0  # Recycle a worker after this many requests; 0 = never
+    WORKER_MAX_REQUESTS_JITTER: int = 0  # Random extra per worker, so they don't recycle together
+    WORKER_MEMORY_LIMIT_MB: int = 0  # Recycle a worker above this RSS; 0 = no limit
+
     # Security
     SECRET_KEY: str = Field(..., min_length=32)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    TOKEN_CACHE_MAX_SIZE: int = 10_000  # 0 disables the verified-token cache
+    TOKEN_CACHE_TTL_SECONDS: int = 300  # Upper bound; entries never outlive `exp`
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_RESYNC_SECONDS: int = 300  # Full reload from Redis, prunes expired
 
     # Database
     POSTGRES_USER: str
@@ -35,9 +49,13 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str = "mdz"
+    DATABASE_URL_OVERRIDE: str | None = None  # Full URL, e.g. SQLite for benchmarks
+    DB_CONNECT_TIMEOUT_SECONDS: int = 5  # libpq connect_timeout for new connections
 
     @property
     def DATABASE_URL(self) -> str:
+        if self.DATABASE_URL_OVERRIDE:
+            return self.DATABASE_URL_OVERRIDE
         return (
             f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
@@ -54,6 +72,12 @@ class Settings(BaseSettings):
         auth = f":{self.REDIS_PASSWORD}@" if self.REDIS_PASSWORD else ""
         return f"redis://{auth}{self.REDIS_HOST}:{self.REDIS_PORT}" f"/{self.REDIS_DB}"
 
+    # Bulk provisioning
+    BULK_HASH_WORKERS: int = 0  # 0 = one per CPU
+    BULK_HASH_PARALLEL_THRESHOLD: int = 16  # Smaller batches are hashed inline
+    BULK_INSERT_BATCH_SIZE: int = 500
+    BULK_REDIS_BATCH_SIZE: int = 500
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
 
@@ -62,8 +86,112 @@ class Settings(BaseSettings):
         default=["http://localhost:3000", "vscode-webview://*"]
     )
 
+    # WebSocket heartbeats
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 30.0  # How often sessions are swept
+    WS_HEARTBEAT_TIMEOUT_SECONDS: float = 90.0  # Sessions silent this long are closed
+
+    # WebSocket topics
+    WS_MAX_TOPICS_PER_CONNECTION: int = 100
+
+    # WebSocket inbound limits (per connection)
+    WS_MAX_FRAME_BYTES: int = 64 * 1024  # Larger text frames are rejected unparsed
+    WS_PROTOCOL_MAX_FRAME_BYTES: int = 1024 * 1024  # uvicorn closes with 1009
+    WS_MESSAGE_RATE_DEFAULT: float = 20.0  # Messages per second, per message type
+    WS_MESSAGE_RATES: dict[str, float] = Field(
+        default_factory=lambda: {"chat.message": 2.0, "context.update": 10.0}
+    )
+    WS_MESSAGE_BURST_SECONDS: float = 2.0  # Bucket size, in seconds of rate
+    WS_MAX_INFLIGHT_PER_CONNECTION: int = 4  # Messages queued or being handled
+    # Connections with this many violations inside the window are closed (1008)
+    WS_MAX_VIOLATIONS: int = 20
+    WS_VIOLATION_WINDOW_SECONDS: float = 60.0
+
+    # WebSocket shutdown drain
+    WS_DRAIN_TIMEOUT_SECONDS: float = 10.0  # Deadline for in-flight handlers
+    # Clients are told to reconnect after a random delay in this range
+    WS_RECONNECT_MIN_SECONDS: float = 1.0
+    WS_RECONNECT_MAX_SECONDS: float = 15.0
+
+    # Chat
+    # Completed chat.message results replayed to retries with the same
+    # (user, request_id) for this long
+    CHAT_DEDUP_TTL_SECONDS: float = 300.0
+    CHAT_DEDUP_MAX_ENTRIES: int = 10_000
+    # Shared across users: identical model + content + context get one answer
+    CHAT_RESPONSE_CACHE_ENABLED: bool = False
+    CHAT_RESPONSE_CACHE_TTL_SECONDS: float = 600.0
+    CHAT_RESPONSE_CACHE_MAX_ENTRIES: int = 1_000
+    # Model backend: "echo" answers inline, "fake" simulates per-batch cost
+    CHAT_BACKEND: Literal["echo", "fake"] = "echo"
+    CHAT_FAKE_BATCH_SECONDS: float = 0.05  # Fixed cost of one fake batch
+    CHAT_FAKE_ITEM_SECONDS: float = 0.005  # Added per request in the batch
+    # Requests for one model are batched until either limit is reached
+    CHAT_BATCH_MAX_SIZE: int = 16
+    CHAT_BATCH_MAX_WAIT_SECONDS: float = 0.005
+    CHAT_BATCH_MAX_CONCURRENCY: int = 1  # Batches at the backend at once
+    # Fair scheduling of chat generation across users (per worker)
+    CHAT_MAX_CONCURRENCY: int = 64  # Requests generating at once
+    CHAT_FAIRNESS_POLICY: Literal["round_robin", "weighted"] = "round_robin"
+    CHAT_MAX_QUEUED_PER_USER: int = 8  # Beyond these, requests get "busy"
+    CHAT_MAX_QUEUED: int = 256
+    # User id -> class name; classes set the weight under the "weighted" policy
+    # and label the queue metrics. Unlisted users are "default".
+    CHAT_USER_CLASSES: dict[int, str] = Field(default_factory=dict)
+    CHAT_CLASS_WEIGHTS: dict[str, float] = Field(
+        default_factory=lambda: {"default": 1.0}
+    )
+
+    @field_validator("CHAT_CLASS_WEIGHTS")
+    @classmethod
+    def _weights_positive(cls, weights: dict[str, float]) -> dict[str, float]:
+        # Fair queuing divides by the weight; 0 fails, negatives invert the order
+        invalid = sorted(name for name, weight in weights.items() if not weight > 0)
+        if invalid:
+            raise ValueError(f"class weights must be > 0: {', '.join(invalid)}")
+        return weights
+
+    # Readiness / startup warm-up
+    WARMUP_ENABLED: bool = True  # Readiness stays not_ready until warm-up finishes
+    WARMUP_DB_CONNECTIONS: int = 5  # Capped at the pool size
+    WARMUP_REDIS_CONNECTIONS: int = 5
+    READINESS_TIMEOUT_SECONDS: float = 1.0  # Per dependency, checks run concurrently
+    READINESS_CACHE_TTL_SECONDS: float = 2.0  # Probe bursts within this share one check
+
+    # Metrics
+    PROMETHEUS_MULTIPROC_DIR: str | None = None  # Set to aggregate across workers
+    METRICS_PROBE_INTERVAL_SECONDS: float = 15.0
+    METRICS_PROBE_TIMEOUT_SECONDS: float = 2.0
+    METRICS_CACHE_TTL_SECONDS: float = 0.0  # 0 = serialize on every scrape
+    METRICS_MAX_SERIES_PER_METRIC: int = 1000  # Excess goes to "__overflow__"
+    HTTP_LATENCY_BUCKETS: list[float] = Field(
+        # Health/cache hits sit in the low ms; bcrypt-bound auth in 0.2-0.5s
+        default=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1]
+        + [0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0]
+    )
+
+    # Profiling (DEBUG only)
+    PROFILE_INTERVAL_SECONDS: float = 0.005
+    PROFILE_MAX_SECONDS: float = 60.0
+    PROFILE_STORE_SIZE: int = 32
+
+    # Event loop watchdog
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1  # How often loop lag is sampled
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.1  # Longer stalls log the loop's stack
+
+    # Tracing
+    TRACING_EXPORTER: Literal["none", "memory", "jsonfile"] = "none"
+    TRACING_SAMPLE_RATE: float = 0.01  # Fraction of requests/messages traced
+    TRACING_FILE: str = "traces.jsonl"  # jsonfile exporter output
+
     # Logging
     LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
+    LOG_ASYNC: bool = True  # Queue + background writer thread instead of print()
+    LOG_QUEUE_SIZE: int = 10_000  # Lines beyond this are dropped, never waited on
+    LOG_BATCH_SIZE: int = 512
+    # Fraction of events kept per event name, e.g. {"http_request": 0.01}.
+    # Warnings and errors are always kept.
+    LOG_SAMPLE_RATES: dict[str, float] = Field(default_factory=dict)
 
 
 # Global settings instance
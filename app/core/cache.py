@@ -2,20 +2,26 @@
 Redis cache client for session storage and rate limiting.
 """
 
-import redis.asyncio as aioredis
-from typing import Any
+from typing import TYPE_CHECKING, Any
 import json
 from app.config import settings
+from app.core.tracing import tracer
+
+if TYPE_CHECKING:
+    import redis.asyncio as aioredis
 
 
 class RedisCache:
     """Async Redis cache wrapper."""
 
     def __init__(self):
-        self.redis: aioredis.Redis | None = None
+        self.redis: "aioredis.Redis | None" = None
 
     async def connect(self):
         """Initialize Redis connection pool."""
+        # Imported here: the client is only needed once the app starts
+        import redis.asyncio as aioredis
+
         self.redis = await aioredis.from_url(
             settings.REDIS_URL,
             encoding="utf-8",
@@ -28,6 +34,7 @@ class RedisCache:
         if self.redis:
             await self.redis.close()
 
+    @tracer.traced("redis.get", child_only=True)
     async def get(self, key: str) -> Any:
         """Get value from cache."""
         if not self.redis:
@@ -40,6 +47,7 @@ class RedisCache:
                 return value
         return None
 
+    @tracer.traced("redis.set", child_only=True)
     async def set(self, key: str, value: Any, expire: int = 3600):
         """Set value in cache with expiration (seconds)."""
         if not self.redis:
@@ -50,18 +58,45 @@ class RedisCache:
 
         return await self.redis.set(key, value, ex=expire)
 
+    @tracer.traced("redis.delete", child_only=True)
     async def delete(self, key: str):
         """Delete key from cache."""
         if not self.redis:
             return 0
         return await self.redis.delete(key)
 
+    @tracer.traced("redis.exists", child_only=True)
     async def exists(self, key: str) -> bool:
         """Check if key exists."""
         if not self.redis:
             return False
         return await self.redis.exists(key) > 0
 
+    @tracer.traced("redis.set_many", child_only=True)
+    async def set_many(
+        self, items: dict[str, Any], expire: int = 3600, batch_size: int = 500
+    ):
+        """Set many keys using pipelined batches (no MULTI/EXEC)."""
+        if not self.redis:
+            return False
+
+        entries = list(items.items())
+        for start in range(0, len(entries), batch_size):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in entries[start:start + batch_size]:
+                    if not isinstance(value, str):
+                        value = json.dumps(value)
+                    pipe.set(key, value, ex=expire)
+                await pipe.execute()
+        return True
+
+    @tracer.traced("redis.publish", child_only=True)
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message on a pub/sub channel."""
+        if not self.redis:
+            return 0
+        return await self.redis.publish(channel, message)
+
 
 # Global cache instance
 cache = RedisCache()
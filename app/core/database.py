@@ -1,27 +1,51 @@
 """
 Database connection and session management.
 """
-from sqlalchemy import create_engine, event
+import functools
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from app.config import settings
+from app.core.tracing import instrument_engine
+
+
+@functools.cache
+def get_engine() -> Engine:
+    """
+    SQLAlchemy engine with connection pooling.
+
+    Created on first use so importing the app doesn't load the database
+    dialect and driver.
+    """
+    url = settings.DATABASE_URL
+    connect_args: dict[str, Any] = (
+        # SQLite (benchmarks, tests) connections are shared across threads
+        {"check_same_thread": False}
+        if url.startswith("sqlite")
+        else {"connect_timeout": settings.DB_CONNECT_TIMEOUT_SECONDS}
+    )
+    engine = create_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=QueuePool,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,  # Verify connections before using
+        echo=settings.DEBUG,
+    )
+    instrument_engine(engine)
+    if engine.dialect.name == "postgresql":
+        event.listen(engine, "connect", set_postgres_pragma)
+    return engine
 
-# SQLAlchemy engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,  # Verify connections before using
-    echo=settings.DEBUG,
-)
 
-# Session factory
+# Session factory (bound to the engine per session, see get_db)
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine
 )
 
 # Base class for models
@@ -37,7 +61,7 @@ def get_db() -> Session:
         def get_items(db: Session = Depends(get_db)):
             return db.query(Item).all()
     """
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
@@ -45,9 +69,8 @@ def get_db() -> Session:
 
 
 # Listener for PostgreSQL connection setup
-@event.listens_for(engine, "connect")
 def set_postgres_pragma(dbapi_conn, connection_record):
     """Set PostgreSQL session parameters."""
     cursor = dbapi_conn.cursor()
     cursor.execute("SET TIME ZONE 'UTC'")
-    cursor.close()
\ No newline at end of file
+    cursor.close()
@@ -1,14 +1,156 @@
 """
 Structured logging configuration using structlog.
+
+Log calls only render the event and enqueue it; a background thread writes
+queued lines to stdout in batches, so the event loop never blocks on I/O.
+When the queue is full, records are dropped and counted rather than waited
+on. Per-event sampling (LOG_SAMPLE_RATES) thins high-volume events such as
+`http_request`; warnings and errors are always kept.
 """
 
+import atexit
 import logging
+import queue
+import random
+import sys
+import threading
+from typing import Any, TextIO
+
+import orjson
 import structlog
 from app.config import settings
+from app.core.monitoring import log_records_dropped_total
+from app.core.tracing import add_trace_ids
+
+_ALWAYS_KEEP = frozenset(("warning", "warn", "error", "exception", "critical", "fatal"))
+
+
+class EventSampler:
+    """structlog processor keeping a fraction of events, by event name."""
+
+    def __init__(self, rates: dict[str, float]):
+        self.rates = rates
+        self._dropped = log_records_dropped_total.labels(reason="sampled")
+
+    def __call__(self, logger: Any, method_name: str, event_dict: dict) -> dict:
+        rate = self.rates.get(event_dict.get("event", ""))
+        if rate is None or rate >= 1 or method_name in _ALWAYS_KEEP:
+            return event_dict
+        if random.random() >= rate:
+            self._dropped.inc()
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+_STOP = object()
+
+
+class QueueLogSink:
+    """Bounded queue of rendered lines drained by a batching writer thread."""
+
+    def __init__(self, stream: TextIO, maxsize: int, batch_size: int):
+        self._stream = stream
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._batch_size = batch_size
+        self._thread: threading.Thread | None = None
+        self._dropped = log_records_dropped_total.labels(reason="queue_full")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def put(self, line: str | bytes):
+        """Enqueue without blocking; drops (and counts) when the queue is full."""
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self._dropped.inc()
+
+    def stop(self, timeout: float = 2.0):
+        """Flush what is queued and stop the writer."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _write(self, batch: list):
+        data = b"".join(
+            (line if isinstance(line, bytes) else line.encode()) + b"\n"
+            for line in batch
+        )
+        buffer = getattr(self._stream, "buffer", None)
+        try:
+            if buffer is not None:
+                buffer.write(data)
+            else:
+                self._stream.write(data.decode())
+            self._stream.flush()
+        except Exception:
+            # Nowhere left to report a broken stdout; keep draining
+            pass
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(line is _STOP for line in batch)
+            if stop:
+                batch = [line for line in batch if line is not _STOP]
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+
+class QueueLogger:
+    """structlog logger that hands rendered lines to a QueueLogSink."""
+
+    def __init__(self, sink: QueueLogSink):
+        self._sink = sink
+
+    def msg(self, message: str | bytes):
+        self._sink.put(message)
+
+    log = debug = info = warn = warning = msg
+    error = critical = exception = fatal = failure = err = msg
+
+
+class QueueLoggerFactory:
+    def __init__(self, sink: QueueLogSink):
+        self._sink = sink
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self._sink)
+
+
+_sink: QueueLogSink | None = None
+
+
+def _renderer():
+    if settings.DEBUG:
+        return structlog.dev.ConsoleRenderer()
+    if settings.LOG_ASYNC:
+        # orjson returns bytes, which only the queue sink accepts
+        return structlog.processors.JSONRenderer(serializer=orjson.dumps)
+    return structlog.processors.JSONRenderer()
 
 
 def configure_logging():
     """Configure structured logging for the application."""
+    global _sink
 
     # Configure standard library logging
     logging.basicConfig(
@@ -16,28 +158,47 @@ def configure_logging():
         level=getattr(logging, settings.LOG_LEVEL),
     )
 
+    if settings.LOG_ASYNC:
+        if _sink is None:
+            _sink = QueueLogSink(
+                sys.stdout, settings.LOG_QUEUE_SIZE, settings.LOG_BATCH_SIZE
+            )
+            atexit.register(shutdown_logging)
+        _sink.start()
+        logger_factory = QueueLoggerFactory(_sink)
+    else:
+        logger_factory = structlog.PrintLoggerFactory()
+
+    processors = [
+        structlog.contextvars.merge_contextvars,
+        add_trace_ids,
+        structlog.processors.add_log_level,
+        structlog.processors.StackInfoRenderer(),
+        structlog.dev.set_exc_info,
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+        _renderer(),
+    ]
+    if settings.LOG_SAMPLE_RATES:
+        # Sample first so dropped events cost no further processing
+        processors.insert(0, EventSampler(settings.LOG_SAMPLE_RATES))
+
     # Configure structlog
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.dev.set_exc_info,
-            structlog.processors.TimeStamper(fmt="iso", utc=True),
-            (
-                structlog.dev.ConsoleRenderer()
-                if settings.DEBUG
-                else structlog.processors.JSONRenderer()
-            ),
-        ],
+        processors=processors,
         wrapper_class=structlog.make_filtering_bound_logger(
             getattr(logging, settings.LOG_LEVEL)
         ),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True,
     )
 
 
+def shutdown_logging():
+    """Flush queued log lines and stop the writer thread."""
+    if _sink is not None:
+        _sink.stop()
+
+
 # Get logger instance
 logger = structlog.get_logger()
@@ -0,0 +1,120 @@
+"""
+Event loop lag monitor and blocking-call detector.
+
+A loop task sleeps for LOOP_MONITOR_INTERVAL_SECONDS and records how late it
+wakes up (`event_loop_lag_seconds`). A helper thread watches the time of the
+last wake-up; when the loop has not ticked for longer than
+LOOP_BLOCK_THRESHOLD_SECONDS it snapshots the loop thread's stack - which is
+the blocking callback, still running - logs it once per episode and counts
+it by route. Routes come from the ASGI scope that the middleware registers
+for the task handling each request or WebSocket.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from starlette.types import Scope
+
+from app.config import settings
+from app.core.logging import logger
+from app.core.monitoring import (
+    event_loop_blocked_seconds_total,
+    event_loop_blocked_total,
+    event_loop_lag_seconds,
+    route_label,
+)
+
+# Route label for stalls outside a tracked request/WebSocket task
+BACKGROUND_ROUTE = "__background__"
+
+
+class LoopWatchdog:
+    """Samples loop lag and reports callbacks that block the loop."""
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._scopes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._last_tick = time.monotonic()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def track(self, scope: Scope):
+        """Attribute stalls in the current task to this request's route."""
+        task = asyncio.current_task()
+        if task is not None:
+            self._scopes[task] = scope
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _tick(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - due)
+            self._last_tick = time.monotonic()
+            event_loop_lag_seconds.observe(lag)
+            if lag >= self.threshold:
+                event_loop_blocked_seconds_total.inc(lag)
+
+    def _route(self) -> str:
+        task = asyncio.current_task(self._loop)
+        scope = self._scopes.get(task) if task is not None else None
+        return route_label(scope) if scope is not None else BACKGROUND_ROUTE
+
+    def _watch(self):
+        reported = None
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(poll):
+            last_tick = self._last_tick
+            stalled = time.monotonic() - last_tick - self.interval
+            if stalled < self.threshold or reported == last_tick:
+                continue
+            reported = last_tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            route = self._route()
+            event_loop_blocked_total.labels(route=route).inc()
+            logger.warning(
+                "event_loop_blocked",
+                route=route,
+                blocked_for=f"{stalled:.3f}s",
+                stack=stack,
+            )
+
+
+loop_watchdog = LoopWatchdog(
+    settings.LOOP_MONITOR_INTERVAL_SECONDS, settings.LOOP_BLOCK_THRESHOLD_SECONDS
+)
@@ -1,29 +1,126 @@
 """
 Prometheus metrics for monitoring.
+
+When PROMETHEUS_MULTIPROC_DIR is set, every worker process writes its samples
+to mmap files in that directory and /metrics aggregates them, so scrapes see
+the same totals whichever worker answers. Gauges declare how worker values
+combine via `multiprocess_mode` (live* modes drop dead workers).
 """
 
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    Gauge,
+    generate_latest,
+    multiprocess,
+    values,
+)
+from prometheus_client.mmap_dict import MmapedDict
+from starlette.types import Scope
+import fcntl
+import glob
+import os
+import threading
 import time
-import redis
 from app.config import settings
 
-# from app.core.monitoring import redis_up, redis_latency_seconds
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = settings.PROMETHEUS_MULTIPROC_DIR
+    # prometheus_client picks its value class when first imported, which may
+    # have happened before settings were loaded; every metric below uses this.
+    values.ValueClass = values.MultiProcessValue()
+
+# -----------------------------------
+# Cardinality control
+# -----------------------------------
+OVERFLOW_LABEL = "__overflow__"
+UNMATCHED_ROUTE = "__unmatched__"
+
+
+def route_label(scope: Scope) -> str:
+    """Matched route template for an ASGI scope; unmatched paths share one label."""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE) if route else UNMATCHED_ROUTE
+
+
+metric_series_overflow_total = Counter(
+    "metric_series_overflow_total",
+    "Observations folded into the overflow label after hitting the series cap",
+    ["metric"],
+)
+
+
+class LabelLimiter:
+    """
+    Hard cap on the label sets a metric may create in this process.
+
+    Once `max_series` distinct label sets exist, new ones have their
+    `overflow_label` replaced with OVERFLOW_LABEL, so scanners and bugs cannot
+    grow memory or scrape size without bound.
+    """
+
+    def __init__(self, metric, overflow_label: str, max_series: int | None = None):
+        self.metric = metric
+        self.overflow_label = overflow_label
+        self.max_series = max_series or settings.METRICS_MAX_SERIES_PER_METRIC
+        self._seen: set[tuple] = set()
+        self._lock = threading.Lock()
+        self._overflow = metric_series_overflow_total.labels(metric=metric._name)
+
+    def labels(self, **labels):
+        key = tuple(labels.values())
+        if key not in self._seen:
+            with self._lock:
+                if len(self._seen) < self.max_series:
+                    self._seen.add(key)
+                else:
+                    labels[self.overflow_label] = OVERFLOW_LABEL
+                    self._overflow.inc()
+        return self.metric.labels(**labels)
+
+
+# -----------------------------------
+# Logging metrics
+# -----------------------------------
+log_records_dropped_total = Counter(
+    "log_records_dropped_total", "Log records not written", ["reason"]
+)
 
 # -----------------------------------
 # Request metrics
 # -----------------------------------
-http_requests_total = Counter(
-    "http_requests_total", "Total HTTP requests", ["method", "endpoint", "status"]
+# `endpoint` is the matched route template (e.g. /api/v1/users/{user_id}),
+# never the raw path.
+http_requests_total = LabelLimiter(
+    Counter(
+        "http_requests_total",
+        "Total HTTP requests",
+        ["method", "endpoint", "status"],
+    ),
+    overflow_label="endpoint",
 )
 
-http_request_duration_seconds = Histogram(
-    "http_request_duration_seconds", "HTTP request latency", ["method", "endpoint"]
+http_request_duration_seconds = LabelLimiter(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency",
+        ["method", "endpoint"],
+        buckets=settings.HTTP_LATENCY_BUCKETS,
+    ),
+    overflow_label="endpoint",
 )
 
 # -----------------------------------
 # Database metrics
 # -----------------------------------
-db_connections = Gauge("db_connections_active", "Active database connections")
+db_connections = Gauge(
+    "db_connections_active",
+    "Active database connections",
+    multiprocess_mode="livesum",
+)
 
 # -----------------------------------
 # Cache metrics
@@ -38,31 +135,341 @@ auth_attempts_total = Counter(
     "auth_attempts_total", "Authentication attempts", ["status"]
 )
 
-# # -----------------------------------
-# # Redis metrics (SYNC)
-# # -----------------------------------
-redis_up = Gauge("mdz_redis_up", "Redis availability (1 = up, 0 = down)")
+token_verifications_total = Counter(
+    "token_verifications_total", "Full JWT verifications", ["result"]
+)
+token_verify_duration_seconds = Histogram(
+    "token_verify_duration_seconds",
+    "JWT parse and signature verification latency",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+token_cache_hits = Counter("token_cache_hits_total", "Verified-token cache hits")
+token_cache_misses = Counter(
+    "token_cache_misses_total", "Verified-token cache misses"
+)
+token_cache_entries = Gauge(
+    "token_cache_entries",
+    "Verified tokens held in the in-process cache",
+    multiprocess_mode="livesum",
+)
+
+token_revocations_total = Counter("token_revocations_total", "Tokens revoked")
+token_revocation_checks_total = Counter(
+    "token_revocation_checks_total", "In-memory revocation checks", ["result"]
+)
+token_revocation_list_size = Gauge(
+    "token_revocation_list_size",
+    "Revoked token ids mirrored in this process",
+    multiprocess_mode="livemax",
+)
+
+# -----------------------------------
+# Event loop metrics
+# -----------------------------------
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a loop callback was due and when it ran",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+event_loop_blocked_seconds_total = Counter(
+    "event_loop_blocked_seconds_total",
+    "Time the loop was blocked past LOOP_BLOCK_THRESHOLD_SECONDS",
+)
+event_loop_blocked_total = LabelLimiter(
+    Counter(
+        "event_loop_blocked_total",
+        "Blocking episodes, by route of the task holding the loop",
+        ["route"],
+    ),
+    overflow_label="route",
+)
+
+# -----------------------------------
+# WebSocket metrics
+# -----------------------------------
+# `type` is a registered handler name, "unknown" or "missing", so the label
+# set stays bounded whatever clients send.
+ws_connections_active = Gauge(
+    "ws_connections_active", "Open WebSocket connections", multiprocess_mode="livesum"
+)
+ws_users_active = Gauge(
+    "ws_users_active",
+    "Distinct users with an open WebSocket (per worker, summed)",
+    multiprocess_mode="livesum",
+)
+ws_messages_total = Counter(
+    "ws_messages_total", "Inbound WebSocket messages", ["type", "outcome"]
+)
+ws_message_duration_seconds = Histogram(
+    "ws_message_duration_seconds",
+    "WebSocket message handler latency",
+    ["type", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+ws_frame_size_bytes = Histogram(
+    "ws_frame_size_bytes",
+    "WebSocket frame payload size",
+    ["direction"],
+    buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+ws_send_duration_seconds = Histogram(
+    "ws_send_duration_seconds",
+    "Time to hand one frame to a connection",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0),
+)
+ws_heartbeat_sweep_duration_seconds = Histogram(
+    "ws_heartbeat_sweep_duration_seconds",
+    "Time to check every session's last heartbeat once",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+# Labelled by registered topic namespace (else "other"), never the topic itself
+ws_topic_subscribers = Gauge(
+    "ws_topic_subscribers",
+    "Topic subscriptions, by topic namespace",
+    ["namespace"],
+    multiprocess_mode="livesum",
+)
+ws_topics_active = Gauge(
+    "ws_topics_active",
+    "Topics with at least one subscriber (per worker, summed)",
+    multiprocess_mode="livesum",
+)
+ws_publish_recipients = Histogram(
+    "ws_publish_recipients",
+    "Sessions a topic publish was delivered to",
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+ws_limit_violations_total = Counter(
+    "ws_limit_violations_total",
+    "Inbound messages rejected by per-connection limits",
+    ["reason"],
+)
+ws_limit_disconnects_total = Counter(
+    "ws_limit_disconnects_total",
+    "Connections closed for repeatedly exceeding inbound limits",
+)
+ws_handlers_inflight = Gauge(
+    "ws_handlers_inflight",
+    "WebSocket message handlers currently running",
+    multiprocess_mode="livesum",
+)
+ws_draining = Gauge(
+    "ws_draining",
+    "1 while this worker is draining WebSocket connections for shutdown",
+    multiprocess_mode="livemax",
+)
+ws_drain_connections_closed_total = Counter(
+    "ws_drain_connections_closed_total",
+    "Connections closed by a drain; outcome=deadline if a handler was still running",
+    ["outcome"],
+)
+ws_drain_duration_seconds = Gauge(
+    "ws_drain_duration_seconds",
+    "Duration of this worker's last WebSocket drain",
+    multiprocess_mode="livemax",
+)
+
+# -----------------------------------
+# Chat
+# -----------------------------------
+# outcome: computed (first request), attached (retry joined the running
+# request) or replayed (retry served the stored result)
+chat_requests_total = Counter(
+    "chat_requests_total", "chat.message requests by dedup outcome", ["outcome"]
+)
+chat_response_cache_lookups_total = Counter(
+    "chat_response_cache_lookups_total", "Shared response cache lookups", ["result"]
+)
+chat_response_cache_entries = Gauge(
+    "chat_response_cache_entries",
+    "Entries in the shared response cache (per worker, summed)",
+    multiprocess_mode="livesum",
+)
+# Model is client-chosen, so batch metrics are not labelled by it
+chat_batches_total = Counter(
+    "chat_batches_total",
+    "Batches sent to the model backend, by what made them due",
+    ["trigger"],
+)
+chat_batch_size = Histogram(
+    "chat_batch_size",
+    "Requests per backend batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+chat_batch_wait_seconds = Histogram(
+    "chat_batch_wait_seconds",
+    "Time a request waited for its batch to be dispatched",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+chat_batch_duration_seconds = Histogram(
+    "chat_batch_duration_seconds",
+    "Backend time per batch",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+# user_class comes from CHAT_USER_CLASSES, so it is bounded by configuration
+chat_running = Gauge(
+    "chat_running",
+    "Chat requests generating (per worker, summed)",
+    multiprocess_mode="livesum",
+)
+chat_queue_depth = Gauge(
+    "chat_queue_depth",
+    "Chat requests waiting for a generation slot",
+    ["user_class"],
+    multiprocess_mode="livesum",
+)
+chat_queue_wait_seconds = Histogram(
+    "chat_queue_wait_seconds",
+    "Time a chat request waited for a generation slot",
+    ["user_class"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+chat_busy_rejections_total = Counter(
+    "chat_busy_rejections_total",
+    "Chat requests turned away because the queues were full",
+    ["user_class"],
+)
+
+# -----------------------------------
+# Dependency probes (updated by app.core.probes.prober)
+# -----------------------------------
+# Availability is the worst live worker's view, latency the slowest one.
+redis_up = Gauge(
+    "mdz_redis_up",
+    "Redis availability (1 = up, 0 = down)",
+    multiprocess_mode="livemin",
+)
 redis_latency_seconds = Gauge(
-    "mdz_redis_latency_seconds", "Redis ping latency in seconds"
+    "mdz_redis_latency_seconds",
+    "Redis ping latency in seconds",
+    multiprocess_mode="livemax",
+)
+db_up = Gauge(
+    "mdz_db_up",
+    "Database availability (1 = up, 0 = down)",
+    multiprocess_mode="livemin",
+)
+db_latency_seconds = Gauge(
+    "mdz_db_latency_seconds",
+    "Database SELECT 1 latency in seconds",
+    multiprocess_mode="livemax",
 )
+warmup_step_duration_seconds = Gauge(
+    "warmup_step_duration_seconds",
+    "Duration of each startup warm-up step in this worker",
+    ["step"],
+    multiprocess_mode="livemax",
+)
+readiness_checks_total = Counter(
+    "readiness_checks_total",
+    "Readiness probe responses by result (cached = served from the TTL cache)",
+    ["result"],
+)
+readiness_probe_duration_seconds = Histogram(
+    "readiness_probe_duration_seconds",
+    "Per-dependency readiness probe latency",
+    ["dependency"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+# -----------------------------------
+# Multiprocess mode
+# -----------------------------------
+_ARCHIVED_TYPES = ("counter", "histogram", "summary")
 
 
-def update_redis_metrics_sync():
-    """Ping Redis using synchronous client and update metrics."""
+def _pid_alive(pid: int) -> bool:
     try:
-        r = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
-        start = time.time()
-        # Real ping using Redis protocol (RESP)
-        r.set("metrics:ping", "1", ex=5)
-        r.get("metrics:ping")
-        latency = time.time() - start
-        redis_up.set(1)
-        redis_latency_seconds.set(latency)
-    except Exception:
-        redis_up.set(0)
-        redis_latency_seconds.set(0)
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def cleanup_dead_workers(path: str | None = None) -> int:
+    """
+    Tidy the multiprocess directory, typically at worker startup.
+
+    Live-gauge files of dead workers are removed so their values disappear.
+    Their counter/histogram/summary files are folded into one archive file
+    per type, so totals never go backwards and the directory does not grow
+    with every recycled worker. Returns the number of dead workers found.
+    """
+    path = path or settings.PROMETHEUS_MULTIPROC_DIR
+    if not path or not os.path.isdir(path):
+        return 0
+
+    with open(os.path.join(path, "cleanup.lock"), "w") as lock:
+        # Workers starting together must not archive the same file twice
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        dead: set[int] = set()
+        for f in glob.glob(os.path.join(path, "*_*.db")):
+            suffix = os.path.basename(f)[:-3].rsplit("_", 1)[1]
+            if suffix.isdigit() and int(suffix) != os.getpid():
+                if not _pid_alive(int(suffix)):
+                    dead.add(int(suffix))
+
+        for pid in dead:
+            multiprocess.mark_process_dead(pid, path)
+            for typ in _ARCHIVED_TYPES:
+                worker_file = os.path.join(path, f"{typ}_{pid}.db")
+                if not os.path.exists(worker_file):
+                    continue
+                archive = MmapedDict(os.path.join(path, f"{typ}_archive.db"))
+                try:
+                    for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(
+                        worker_file
+                    ):
+                        archived, _ = archive.read_value(key)
+                        archive.write_value(key, archived + value, timestamp)
+                finally:
+                    archive.close()
+                os.remove(worker_file)
+
+    return len(dead)
+
+
+_multiprocess_registry: CollectorRegistry | None = None
+
+
+def _collection_registry():
+    global _multiprocess_registry
+
+    if not settings.PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    if _multiprocess_registry is None:
+        _multiprocess_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(
+            _multiprocess_registry, path=settings.PROMETHEUS_MULTIPROC_DIR
+        )
+    return _multiprocess_registry
+
+
+_metrics_cache: tuple[float, bytes] | None = None
+_metrics_lock = threading.Lock()
 
 
 def get_metrics():
-    """Generate Prometheus metrics output."""
-    return generate_latest()
+    """
+    Generate Prometheus metrics output.
+
+    In multiprocess mode the output aggregates all workers. With
+    METRICS_CACHE_TTL_SECONDS > 0, the serialized registry is reused for
+    that long and concurrent scrapes wait for a single serialization.
+    """
+    global _metrics_cache
+
+    registry = _collection_registry()
+    ttl = settings.METRICS_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return generate_latest(registry)
+
+    with _metrics_lock:
+        now = time.monotonic()
+        if _metrics_cache is None or now - _metrics_cache[0] >= ttl:
+            _metrics_cache = (now, generate_latest(registry))
+        return _metrics_cache[1]
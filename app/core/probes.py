@@ -0,0 +1,183 @@
+"""
+Dependency probes (Redis, database), the background prober that keeps
+their Prometheus gauges fresh without touching the /metrics request path,
+and the cached readiness check behind /health/readiness.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, NamedTuple
+
+import structlog
+from sqlalchemy import text
+
+from app.config import settings
+from app.core.cache import cache
+from app.core.database import get_engine
+from app.core.monitoring import (
+    db_latency_seconds,
+    db_up,
+    readiness_checks_total,
+    readiness_probe_duration_seconds,
+    redis_latency_seconds,
+    redis_up,
+)
+
+logger = structlog.get_logger()
+
+
+class ProbeResult(NamedTuple):
+    ok: bool
+    latency: float
+    error: str | None = None
+
+
+async def probe_redis(timeout: float) -> ProbeResult:
+    """PING Redis through the shared connection pool."""
+    if not cache.redis:
+        return ProbeResult(False, 0.0, "not connected")
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(cache.redis.ping(), timeout)
+    except asyncio.TimeoutError:
+        return ProbeResult(False, time.perf_counter() - start, "timeout")
+    except Exception as e:
+        return ProbeResult(False, time.perf_counter() - start, str(e))
+    return ProbeResult(True, time.perf_counter() - start)
+
+
+def _ping_database(timeout: float):
+    engine = get_engine()
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # A hung server fails the statement instead of holding the thread
+            conn.execute(text(f"SET LOCAL statement_timeout = {max(1, int(timeout * 1000))}"))
+        conn.execute(text("SELECT 1"))
+
+
+# The running ping, if any. A timed-out ping's thread can't be stopped, so
+# later probes wait on it rather than piling up threads in the default
+# executor that every other to_thread caller shares.
+_db_ping: asyncio.Future | None = None
+
+
+def _retrieve(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()  # Nobody may be waiting when a late ping fails
+
+
+async def probe_database(timeout: float) -> ProbeResult:
+    """Run SELECT 1 on a pooled connection, off the event loop."""
+    global _db_ping
+
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    if _db_ping is None or _db_ping.done() or _db_ping.get_loop() is not loop:
+        _db_ping = asyncio.ensure_future(asyncio.to_thread(_ping_database, timeout))
+        _db_ping.add_done_callback(_retrieve)
+    try:
+        # Shielded: a timeout leaves the ping running, and tracked, for reuse
+        await asyncio.wait_for(asyncio.shield(_db_ping), timeout)
+    except asyncio.TimeoutError:
+        return ProbeResult(False, time.perf_counter() - start, "timeout")
+    except Exception as e:
+        return ProbeResult(False, time.perf_counter() - start, str(e))
+    return ProbeResult(True, time.perf_counter() - start)
+
+
+class DependencyProber:
+    """Periodically probes dependencies and records the results as gauges."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def run_once(self):
+        timeout = settings.METRICS_PROBE_TIMEOUT_SECONDS
+        redis_result, db_result = await asyncio.gather(
+            probe_redis(timeout), probe_database(timeout)
+        )
+
+        redis_up.set(1 if redis_result.ok else 0)
+        redis_latency_seconds.set(redis_result.latency if redis_result.ok else 0)
+        db_up.set(1 if db_result.ok else 0)
+        db_latency_seconds.set(db_result.latency if db_result.ok else 0)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("dependency_probe_failed", error=str(e))
+            await asyncio.sleep(settings.METRICS_PROBE_INTERVAL_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class ReadinessChecker:
+    """
+    Concurrent, time-bounded dependency checks whose result is cached for
+    `ttl` seconds. Concurrent callers on a cache miss share one check.
+    """
+
+    def __init__(self, ttl: float, timeout: float):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: dict | None = None
+        self._expires_at = 0.0
+        self._inflight: asyncio.Future | None = None
+
+    async def check(self) -> dict:
+        if self._result is not None and time.monotonic() < self._expires_at:
+            readiness_checks_total.labels(result="cached").inc()
+            return self._result
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._run())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # Shielded so one cancelled probe request doesn't cancel the others
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future: asyncio.Future):
+        self._inflight = None
+
+    async def _run(self) -> dict:
+        results = dict(
+            zip(
+                ("database", "cache"),
+                await asyncio.gather(
+                    probe_database(self.timeout), probe_redis(self.timeout)
+                ),
+            )
+        )
+        checks: dict[str, Any] = {"timestamp": datetime.utcnow().isoformat()}
+        latency = {}
+        for name, result in results.items():
+            checks[name] = result.ok
+            if result.error is not None:
+                checks[f"{name}_error"] = result.error
+            latency[name] = round(result.latency, 6)
+            readiness_probe_duration_seconds.labels(dependency=name).observe(
+                result.latency
+            )
+        checks["latency_seconds"] = latency
+
+        status = "ready" if all(r.ok for r in results.values()) else "not_ready"
+        readiness_checks_total.labels(result=status).inc()
+        self._result = {"status": status, "checks": checks}
+        self._expires_at = time.monotonic() + self.ttl
+        return self._result
+
+
+# Global prober
+prober = DependencyProber()
+readiness = ReadinessChecker(
+    settings.READINESS_CACHE_TTL_SECONDS, settings.READINESS_TIMEOUT_SECONDS
+)
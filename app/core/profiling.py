@@ -0,0 +1,135 @@
+"""
+Wall-clock sampling profiler with flamegraph-compatible output.
+
+A helper thread periodically snapshots thread stacks via
+`sys._current_frames()`; nothing is hooked into the interpreter, so there is
+no cost while no profile is running. Output is in "collapsed stack" format
+(`frame;frame;frame count` per line), accepted by flamegraph.pl, speedscope
+and inferno.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+from app.config import settings
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_frame(frame) -> str:
+    """Render a frame and its callers root-first, `;`-separated."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Samples the stacks of the given threads (default: all) at an interval."""
+
+    def __init__(self, interval: float = 0.005, thread_ids: set[int] | None = None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                thread = names.get(thread_id, str(thread_id)).replace(";", "_")
+                self.samples[f"{thread};{collapse_frame(frame)}"] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Most recent per-request/per-message profiles, by id."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._profiles: OrderedDict[str, str] = OrderedDict()
+
+    def add(self, collapsed: str, profile_id: str | None = None) -> str:
+        profile_id = profile_id or uuid.uuid4().hex
+        self._profiles[profile_id] = collapsed
+        while len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> str | None:
+        return self._profiles.get(profile_id)
+
+
+# Per-request profiling is only ever honoured in DEBUG
+PROFILING_ENABLED = settings.DEBUG
+PROFILE_HEADER = b"x-profile"
+
+profile_store = ProfileStore(settings.PROFILE_STORE_SIZE)
+# One profile of any kind at a time; held from start until the sampler stopped
+_profile_lock = threading.Lock()
+
+
+def start_current_thread_profile() -> SamplingProfiler | None:
+    """
+    Start sampling only the calling thread (the event loop for async code).
+    Returns None if another profile is already running; otherwise the caller
+    must hand the profiler to `finish_profile`.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = SamplingProfiler(
+        settings.PROFILE_INTERVAL_SECONDS, thread_ids={threading.get_ident()}
+    )
+    profiler.start()
+    return profiler
+
+
+async def finish_profile(profiler: SamplingProfiler) -> str:
+    """Stop a profile and release the guard; returns collapsed stacks."""
+    try:
+        # Joining the sampler waits up to an interval; not on the event loop
+        await asyncio.to_thread(profiler.stop)
+    finally:
+        _profile_lock.release()
+    return profiler.collapsed()
+
+
+async def profile_process(seconds: float, interval: float) -> str | None:
+    """
+    Sample every thread for `seconds`. Returns collapsed stacks, or None if
+    another profile is already running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        collapsed = await finish_profile(profiler)
+    return collapsed
@@ -0,0 +1,186 @@
+"""
+JWT revocation list.
+
+Revoked `jti`s live in Redis (`auth:revoked:<jti>`, expiring with the token)
+and are announced on a pub/sub channel. Each worker mirrors them in memory: a
+Bloom filter answers the common "not revoked" case, and an exact set confirms
+Bloom positives, so checks never leave the process.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+
+import structlog
+
+from app.config import settings
+from app.core.cache import cache
+from app.core.monitoring import (
+    token_revocation_checks_total,
+    token_revocation_list_size,
+    token_revocations_total,
+)
+
+logger = structlog.get_logger()
+
+REVOKED_KEY_PREFIX = "auth:revoked:"
+REVOCATION_CHANNEL = "auth:revocations"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on BLAKE2b)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.size = max(size, 8)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationList:
+    """Per-worker mirror of the Redis revocation list."""
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}  # jti -> token exp (unix seconds)
+        self._bloom = self._new_bloom()
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def _new_bloom() -> BloomFilter:
+        return BloomFilter(
+            settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE
+        )
+
+    def is_revoked(self, jti: str | None) -> bool:
+        """In-memory revocation check. Tokens without a `jti` cannot be revoked."""
+        if not jti:
+            return False
+        if jti not in self._bloom:
+            token_revocation_checks_total.labels(result="bloom_negative").inc()
+            return False
+        if jti in self._revoked:
+            token_revocation_checks_total.labels(result="revoked").inc()
+            return True
+        token_revocation_checks_total.labels(result="false_positive").inc()
+        return False
+
+    def add_local(self, jti: str, exp: float):
+        """Record a revocation in this worker only."""
+        if jti not in self._revoked:
+            self._bloom.add(jti)
+        self._revoked[jti] = exp
+        token_revocation_list_size.set(len(self._revoked))
+
+    async def revoke(self, jti: str, exp: float):
+        """Revoke a token id cluster-wide until the token's own expiry."""
+        self.add_local(jti, exp)
+        token_revocations_total.inc()
+
+        ttl = int(exp - time.time()) + 1
+        if ttl <= 0 or not cache.redis:
+            return
+        await cache.set(f"{REVOKED_KEY_PREFIX}{jti}", str(int(exp)), expire=ttl)
+        await cache.publish(REVOCATION_CHANNEL, f"{jti}:{int(exp)}")
+
+    async def load(self):
+        """Rebuild the mirror from Redis, dropping expired entries."""
+        if not cache.redis:
+            return
+
+        revoked: dict[str, float] = {}
+        keys = [k async for k in cache.redis.scan_iter(match=f"{REVOKED_KEY_PREFIX}*", count=1000)]
+        for i in range(0, len(keys), 1000):
+            batch = keys[i:i + 1000]
+            for key, value in zip(batch, await cache.redis.mget(batch)):
+                if value is not None:
+                    revoked[key[len(REVOKED_KEY_PREFIX):]] = float(value)
+
+        now = time.time()
+        bloom = self._new_bloom()
+        for jti, exp in list(revoked.items()):
+            if exp <= now:
+                del revoked[jti]
+            else:
+                bloom.add(jti)
+
+        # Keep revocations that arrived locally while the snapshot was taken
+        for jti, exp in self._revoked.items():
+            if exp > now and jti not in revoked:
+                revoked[jti] = exp
+                bloom.add(jti)
+
+        self._revoked, self._bloom = revoked, bloom
+        token_revocation_list_size.set(len(revoked))
+
+    async def start(self):
+        """Load the snapshot and start pub/sub sync and periodic resync."""
+        if not cache.redis or self._tasks:
+            return
+        try:
+            await self.load()
+        except Exception as e:
+            # The listener keeps retrying and reloads once Redis is reachable
+            logger.warning("revocation_load_failed", error=str(e))
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._resync_loop()),
+        ]
+        logger.info("revocation_list_started", entries=len(self._revoked))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _listen(self):
+        while True:
+            pubsub = cache.redis.pubsub()
+            try:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                # Anything published while we were unsubscribed was missed
+                await self.load()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    jti, _, exp = message["data"].rpartition(":")
+                    if jti:
+                        self.add_local(jti, float(exp))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("revocation_listener_error", error=str(e))
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def _resync_loop(self):
+        while True:
+            await asyncio.sleep(settings.REVOCATION_RESYNC_SECONDS)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.warning("revocation_resync_failed", error=str(e))
+
+
+# Global revocation list
+revocation_list = RevocationList()
@@ -3,22 +3,45 @@ Security utilities: JWT, password hashing, API key validation.
 """
 
 from datetime import datetime, timedelta
+import functools
+import hashlib
+import time
+import uuid
 from typing import Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.config import settings
+from app.core.monitoring import (
+    token_cache_entries,
+    token_cache_hits,
+    token_cache_misses,
+    token_verifications_total,
+    token_verify_duration_seconds,
+)
+from app.core.revocation import revocation_list
+from app.core.ttl_cache import TTLCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# python-jose (and its crypto backends) and passlib are imported on first use
+# rather than at import time, to keep worker startup fast.
+@functools.cache
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Verified claims keyed by token digest. Uses wall-clock time so entries can be
+# expired at the token's own `exp`.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, clock=time.time)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Generate password hash."""
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def create_access_token(
@@ -44,6 +67,9 @@ def create_access_token(
         )
 
     to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+
+    from jose import jwt
 
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
@@ -52,17 +78,64 @@ def create_access_token(
     return encoded_jwt
 
 
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
 def decode_access_token(token: str) -> dict[str, Any] | None:
     """
     Decode and validate JWT token.
 
+    Verified claims are served from `token_cache` until the earlier of the
+    token's `exp` and TOKEN_CACHE_TTL_SECONDS. The revocation list is checked
+    on every call, cache hit or not.
+
     Returns:
-        Decoded payload or None if invalid
+        Decoded payload or None if invalid or revoked
     """
+    key = _token_key(token)
+
+    claims = token_cache.get(key)
+    if claims is not None:
+        token_cache_hits.inc()
+        if revocation_list.is_revoked(claims.get("jti")):
+            invalidate_cached_token(token)
+            return None
+        return dict(claims)
+    token_cache_misses.inc()
+
+    from jose import JWTError, jwt
+
+    start = time.perf_counter()
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
+        token_verifications_total.labels(result="invalid").inc()
         return None
+    finally:
+        token_verify_duration_seconds.observe(time.perf_counter() - start)
+
+    token_verifications_total.labels(result="valid").inc()
+
+    if revocation_list.is_revoked(payload.get("jti")):
+        return None
+
+    # Tokens without `exp` are never cached: nothing bounds their lifetime.
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(
+            key,
+            payload,
+            expires_at=min(exp, time.time() + settings.TOKEN_CACHE_TTL_SECONDS),
+        )
+        token_cache_entries.set(len(token_cache))
+
+    return dict(payload)
+
+
+def invalidate_cached_token(token: str):
+    """Drop a token from the verified-token cache (e.g. after revocation)."""
+    token_cache.pop(_token_key(token))
+    token_cache_entries.set(len(token_cache))
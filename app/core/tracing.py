@@ -0,0 +1,253 @@
+"""
+Lightweight request/message tracing.
+
+Spans are kept in a contextvar, so they follow a request or WebSocket message
+across awaits and into threadpool calls, and nest automatically. Sampling is
+head-based: the root span decides once and unsampled traces carry a shared
+non-recording span, so their children cost a contextvar lookup. Redis and
+database spans are only recorded inside a sampled trace, never as roots.
+
+Finished spans go to a pluggable exporter (TRACING_EXPORTER): "memory" keeps
+the most recent spans for tests, "jsonfile" appends one JSON line per span
+for local runs, and "none" discards them.
+"""
+
+import functools
+import json
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+
+from app.config import settings
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "duration",
+        "attributes",
+        "error",
+        "_start",
+    )
+
+    sampled = True
+
+    def __init__(
+        self, name: str, trace_id: str, parent_id: str | None, attributes: dict
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.error: str | None = None
+        self.duration: float | None = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NonRecordingSpan:
+    """Stand-in for every span of an unsampled trace."""
+
+    __slots__ = ()
+
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NOT_SAMPLED = _NonRecordingSpan()
+
+_current_span: ContextVar[Span | _NonRecordingSpan | None] = ContextVar(
+    "current_span", default=None
+)
+
+
+def current_span() -> Span | None:
+    """The active sampled span, if any."""
+    span = _current_span.get()
+    return span if isinstance(span, Span) else None
+
+
+# -----------------------------------
+# Exporters
+# -----------------------------------
+class NoopExporter:
+    def export(self, span: Span):
+        pass
+
+
+class MemoryExporter:
+    """Keeps the most recent finished spans; for tests and debugging."""
+
+    def __init__(self, maxsize: int = 10_000):
+        self.spans: deque[Span] = deque(maxlen=maxsize)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+
+class JsonFileExporter:
+    """Appends one JSON line per span; meant for local runs, not production."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+def _exporter_from_settings():
+    if settings.TRACING_EXPORTER == "memory":
+        return MemoryExporter()
+    if settings.TRACING_EXPORTER == "jsonfile":
+        return JsonFileExporter(settings.TRACING_FILE)
+    return NoopExporter()
+
+
+# -----------------------------------
+# Tracer
+# -----------------------------------
+class Tracer:
+    def __init__(self, exporter, sample_rate: float):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_span(
+        self, name: str, attributes: dict | None = None, child_only: bool = False
+    ) -> Span | _NonRecordingSpan | None:
+        """
+        Create (but do not activate) a span under the current one. Returns
+        NOT_SAMPLED for unsampled traces, and None for `child_only` spans
+        started outside any trace.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            if child_only:
+                return None
+            if random.random() >= self.sample_rate:
+                return NOT_SAMPLED
+            return Span(name, f"{random.getrandbits(128):032x}", None, attributes or {})
+        if not isinstance(parent, Span):
+            return NOT_SAMPLED
+        return Span(name, parent.trace_id, parent.span_id, attributes or {})
+
+    def end_span(self, span: Span | _NonRecordingSpan | None):
+        if isinstance(span, Span):
+            span.finish()
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, child_only: bool = False, **attributes):
+        """Run a block in a new span; yields it (or a non-recording stand-in)."""
+        span = self.start_span(name, attributes, child_only)
+        if span is None:
+            yield NOT_SAMPLED
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def traced(self, name: str, child_only: bool = False):
+        """Decorator running an async function in a span."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                parent = _current_span.get()
+                if parent is NOT_SAMPLED or (parent is None and child_only):
+                    return await func(*args, **kwargs)
+                with self.span(name, child_only):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+tracer = Tracer(_exporter_from_settings(), settings.TRACING_SAMPLE_RATE)
+
+
+def add_trace_ids(logger: Any, method_name: str, event_dict: dict) -> dict:
+    """structlog processor adding trace_id/span_id inside a sampled span."""
+    span = _current_span.get()
+    if isinstance(span, Span):
+        event_dict["trace_id"] = span.trace_id
+        event_dict["span_id"] = span.span_id
+    return event_dict
+
+
+def instrument_engine(engine):
+    """Record a `db.query` span around each cursor execution of `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.start_span(
+            "db.query", {"statement": statement[:200]}, child_only=True
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            tracer.end_span(spans.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            if isinstance(span, Span):
+                span.record_error(exception_context.original_exception)
+            tracer.end_span(span)
@@ -0,0 +1,130 @@
+"""
+Startup warm-up.
+
+Runs once in the background after `lifespan` startup so the first real
+requests don't pay for opening pool connections, the first bcrypt and JWT
+calls, or first-use pydantic validation. `/health/readiness` reports
+not_ready while it is pending. Each step is timed, logged and exported as
+`warmup_step_duration_seconds{step}`; a failing step is logged and skipped,
+never left holding readiness down.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import structlog
+from sqlalchemy import QueuePool, text
+
+from app.config import settings
+from app.core.cache import cache
+from app.core.database import get_engine
+from app.core.monitoring import warmup_step_duration_seconds
+from app.core.security import (
+    create_access_token,
+    decode_access_token,
+    get_password_hash,
+    invalidate_cached_token,
+    verify_password,
+)
+from app.schemas.auth import Token, UserCreate, UserLogin, UserResponse
+from app.schemas.websocket import ErrorMessage
+
+logger = structlog.get_logger()
+
+
+def _open_db_connections(count: int):
+    # First use builds the engine, which imports the driver; keep it off the loop
+    engine = get_engine()
+    # Only a QueuePool keeps several connections open; other pools get one
+    pool = engine.pool
+    count = min(count, pool.size()) if isinstance(pool, QueuePool) else 1
+    # Holding them all at once makes the pool open `count` distinct connections
+    conns = []
+    try:
+        for _ in range(count):
+            conns.append(engine.connect())
+            conns[-1].execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+async def warm_database():
+    await asyncio.to_thread(_open_db_connections, settings.WARMUP_DB_CONNECTIONS)
+
+
+async def warm_redis():
+    if not cache.redis:
+        raise RuntimeError("Redis not connected")
+    # Concurrent PINGs each check out their own pooled connection
+    await asyncio.gather(
+        *(cache.redis.ping() for _ in range(settings.WARMUP_REDIS_CONNECTIONS))
+    )
+
+
+def _exercise_security():
+    verify_password("warmup-password", get_password_hash("warmup-password"))
+    token = create_access_token({"sub": "0"})
+    decode_access_token(token)
+    invalidate_cached_token(token)
+
+
+async def warm_security():
+    await asyncio.to_thread(_exercise_security)
+
+
+async def warm_schemas():
+    UserCreate.model_validate({"email": "warmup@example.com", "password": "x" * 8})
+    UserLogin.model_validate_json('{"email": "warmup@example.com", "password": "x"}')
+    Token(access_token="x").model_dump_json()
+    UserResponse.model_json_schema()
+    ErrorMessage(error="warmup", code="warmup").model_dump(mode="json")
+
+
+DEFAULT_STEPS: dict[str, Callable[[], Awaitable[None]]] = {
+    "database": warm_database,
+    "redis": warm_redis,
+    "security": warm_security,
+    "schemas": warm_schemas,
+}
+
+
+class Warmup:
+    """Runs warm-up steps in order in a background task."""
+
+    def __init__(self, steps: dict[str, Callable[[], Awaitable[None]]]):
+        self.steps = steps
+        self.pending = False
+        self._task: asyncio.Task | None = None
+
+    async def run(self):
+        self.pending = True
+        start = time.perf_counter()
+        try:
+            for name, step in self.steps.items():
+                step_start = time.perf_counter()
+                try:
+                    await step()
+                except Exception as e:
+                    logger.warning("warmup_step_failed", step=name, error=str(e))
+                duration = time.perf_counter() - step_start
+                warmup_step_duration_seconds.labels(step=name).set(duration)
+                logger.info("warmup_step", step=name, duration=f"{duration:.3f}s")
+        finally:
+            self.pending = False
+        logger.info("warmup_complete", duration=f"{time.perf_counter() - start:.3f}s")
+
+    def start(self):
+        if self._task is None:
+            self.pending = True
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+warmup = Warmup(DEFAULT_STEPS)
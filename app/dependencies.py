@@ -0,0 +1,68 @@
+"""
+Shared FastAPI dependencies.
+"""
+
+from typing import Any
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, get_db, get_engine
+from app.core.security import decode_access_token
+from app.models.user import User
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def get_token_payload(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> dict[str, Any]:
+    """Validate the bearer token (signature, expiry, revocation)."""
+    payload = (
+        decode_access_token(credentials.credentials) if credentials else None
+    )
+    if not payload or "sub" not in payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+def get_current_user(
+    payload: dict[str, Any] = Depends(get_token_payload),
+    db: Session = Depends(get_db),
+) -> User:
+    """Resolve the authenticated, active user."""
+    user = db.get(User, int(payload["sub"]))
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def get_current_superuser(user: User = Depends(get_current_user)) -> User:
+    """Require an authenticated superuser."""
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough privileges"
+        )
+    return user
+
+
+def is_active_superuser(user_id: int) -> bool:
+    """
+    Superuser check outside a request's dependencies (profiling triggers in
+    middleware and on WebSocket messages). Blocking; run it in the thread pool.
+    """
+    db = SessionLocal(bind=get_engine())
+    try:
+        user = db.get(User, user_id)
+        return bool(user and user.is_active and user.is_superuser)
+    finally:
+        db.close()
@@ -2,50 +2,85 @@
 mdz Backend - FastAPI Application
 """
 
+import sys
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, Response
+from fastapi import Depends, FastAPI, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from prometheus_client import CONTENT_TYPE_LATEST
-import time
 
 from app.config import settings
-from app.core.logging import configure_logging, logger
+from app.core.logging import configure_logging, logger, shutdown_logging
 
 from app.core.cache import cache
-from app.core.database import engine, Base
-from app.core.monitoring import (
-    get_metrics,
-    http_requests_total,
-    http_request_duration_seconds,
-    update_redis_metrics_sync,
-)
+from app.core.loop_monitor import loop_watchdog
+from app.core.revocation import revocation_list
+from app.middleware.observability import ObservabilityMiddleware
+from app.core.database import Base, get_engine
+from app.core.monitoring import cleanup_dead_workers, get_metrics
+from app.core.profiling import profile_process, profile_store
+from app.dependencies import get_current_superuser
+from app.core.probes import prober
+from app.core.warmup import warmup
 from app.api.v1 import auth, health, websocket
+from app.chat.batching import batcher
+from app.websocket import manager
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
-    logger.info("application_starting", version=settings.APP_VERSION)
     configure_logging()
+    logger.info("application_starting", version=settings.APP_VERSION)
+
+    # Measure loop lag and report blocking callbacks, starting with our own
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_watchdog.start()
+
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        dead = cleanup_dead_workers()
+        logger.info("metrics_multiprocess_enabled", dead_workers_cleaned=dead)
 
     # Initialize Redis
     await cache.connect()
     logger.info("REDIS::STATUS::CONNECTED")
-    print(settings.REDIS_URL)
+
+    # Mirror the token revocation list into this worker
+    await revocation_list.start()
+
+    # Keep dependency gauges fresh off the /metrics path
+    prober.start()
 
     # Create database tables (development only)
     if settings.ENVIRONMENT == "development":
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=get_engine())
         logger.info("database_tables_created")
 
+    # Pre-open pool connections and exercise hot paths; gates readiness
+    if settings.WARMUP_ENABLED:
+        warmup.start()
+
     yield
 
     # Shutdown
+    # No-op if DrainingServer already drained; otherwise closes what's left
+    await manager.drain(settings.WS_DRAIN_TIMEOUT_SECONDS)
+    # Dedup tasks can outlive their handlers; let their batches finish
+    await batcher.close()
+    await warmup.stop()
+    # Only loaded (and only has a hash pool) if bulk registration was used
+    provisioning = sys.modules.get("app.services.provisioning")
+    if provisioning is not None:
+        provisioning.shutdown_hash_pool()
+    await prober.stop()
+    await revocation_list.stop()
     await cache.disconnect()
     logger.info("REDIS::STATUS::DISCONNECTED")
+    await loop_watchdog.stop()
+    shutdown_logging()
 
 
 # Create FastAPI app
@@ -68,56 +103,8 @@ app.add_middleware(
 )
 
 
-# Security Headers Middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    """Add security headers to all responses."""
-    response = await call_next(request)
-
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = (
-        "max-age=31536000; includeSubDomains"
-    )
-
-    if settings.ENVIRONMENT == "production":
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-
-    return response
-
-
-# Request Logging & Metrics Middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all requests and collect metrics."""
-    start_time = time.time()
-
-    # Process request
-    response = await call_next(request)
-
-    # Calculate duration
-    duration = time.time() - start_time
-
-    # Log
-    logger.info(
-        "http_request",
-        method=request.method,
-        path=request.url.path,
-        status_code=response.status_code,
-        duration=f"{duration:.3f}s",
-    )
-
-    # Metrics
-    http_requests_total.labels(
-        method=request.method, endpoint=request.url.path, status=response.status_code
-    ).inc()
-
-    http_request_duration_seconds.labels(
-        method=request.method, endpoint=request.url.path
-    ).observe(duration)
-
-    return response
+# Request Logging, Metrics & Security Headers (outermost)
+app.add_middleware(ObservabilityMiddleware)
 
 
 # Include routers
@@ -129,7 +116,6 @@ app.include_router(websocket.ws_router, prefix=settings.API_V1_PREFIX)
 # Prometheus metrics endpoint
 @app.get("/metrics")
 def metrics():
-    update_redis_metrics_sync()
     return Response(get_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
@@ -148,3 +134,39 @@ async def root():
 async def cache_test():
     await cache.set("victor:test", {"hello": "world"})
     return {"saved": True}
+
+
+# Profiling (debug-only, admin-protected)
+if settings.DEBUG:
+
+    @app.get(
+        "/debug/profile",
+        response_class=PlainTextResponse,
+        dependencies=[Depends(get_current_superuser)],
+    )
+    async def debug_profile(
+        seconds: float = Query(5.0, gt=0, le=settings.PROFILE_MAX_SECONDS),
+        interval_ms: float = Query(5.0, ge=1, le=100),
+    ):
+        """Wall-clock sample all threads; returns collapsed stacks."""
+        collapsed = await profile_process(seconds, interval_ms / 1000)
+        if collapsed is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A profile is already running",
+            )
+        return collapsed
+
+    @app.get(
+        "/debug/profiles/{profile_id}",
+        response_class=PlainTextResponse,
+        dependencies=[Depends(get_current_superuser)],
+    )
+    async def debug_profile_result(profile_id: str):
+        """Collapsed stacks for a request (X-Profile header) or WS message."""
+        collapsed = profile_store.get(profile_id)
+        if collapsed is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+            )
+        return collapsed
@@ -2,6 +2,8 @@
 Authentication request/response schemas.
 """
 
+from typing import Literal
+
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -40,3 +42,35 @@ class UserResponse(BaseModel):
     is_active: bool
 
     model_config = {"from_attributes": True}
+
+
+class BulkUserRow(BaseModel):
+    """One row of a bulk registration; validated per row against UserCreate."""
+
+    email: str
+    password: str
+
+
+class BulkUserCreate(BaseModel):
+    """Schema for bulk user registration."""
+
+    users: list[BulkUserRow] = Field(..., min_length=1, max_length=10_000)
+
+
+class BulkUserResult(BaseModel):
+    """Outcome for one row of a bulk registration."""
+
+    index: int
+    email: str
+    status: Literal["created", "duplicate", "invalid"]
+    id: int | None = None
+    error: str | None = None
+
+
+class BulkRegisterResponse(BaseModel):
+    """Bulk registration summary with per-row status."""
+
+    created: int
+    duplicates: int
+    invalid: int
+    results: list[BulkUserResult]
@@ -42,6 +42,14 @@ class ContextUpdateMessage(BaseModel):
     context: dict
 
 
+class SubscriptionMessage(BaseModel):
+    type: Literal["subscribe", "unsubscribe"]
+    topic: str = Field(
+        ..., min_length=1, max_length=128, pattern=r"^[A-Za-z0-9_.:/-]+$"
+    )
+    request_id: Optional[str] = None
+
+
 class ErrorMessage(BaseModel):
     type: Literal["error"] = "error"
     error: str
@@ -51,5 +59,8 @@ class ErrorMessage(BaseModel):
 
 class StatusMessage(BaseModel):
     type: Literal["status"] = "status"
-    status: Literal["connected", "processing", "idle", "error"]
+    status: Literal["connected", "processing", "idle", "error", "reconnect", "busy"]
     message: Optional[str] = None
+    # Seconds; set with status="reconnect" or "busy"
+    retry_after: Optional[float] = None
+    request_id: Optional[str] = None
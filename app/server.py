@@ -0,0 +1,179 @@
+"""
+uvicorn server pieces used by the production entry point (`python -m app`).
+
+Plain uvicorn closes every WebSocket with 1012 as soon as shutdown starts,
+before the application's lifespan shutdown runs. DrainingServer first runs
+`manager.drain()`, so clients get a jittered reconnect hint and in-flight
+handlers can finish. The lifespan shutdown also drains, for servers started
+some other way (then only cleanup is left to do).
+
+DrainingServer also exits gracefully once the worker's RSS passes
+`memory_limit_mb`. Supervisor runs `run_worker` in spawned processes and
+replaces any that exit, which is how request/memory recycling takes effect.
+"""
+
+import multiprocessing
+import os
+import random
+import resource
+import signal
+import socket
+import time
+from multiprocessing.process import BaseProcess
+
+import structlog
+import uvicorn
+from uvicorn.config import HTTPProtocolType, LoopSetupType
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# on_tick runs every 0.1s; check memory about every 5s
+_MEMORY_CHECK_TICKS = 50
+# Give drains their deadline plus a margin before workers are killed
+_STOP_GRACE_SECONDS = settings.WS_DRAIN_TIMEOUT_SECONDS + 10
+# Workers dying faster than this are restarted with a delay
+_CRASH_WINDOW_SECONDS = 5.0
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process, in MiB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak, not current, RSS (KiB on Linux); good enough as a ceiling
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bind_reuseport(host: str, port: int, backlog: int) -> socket.socket:
+    """
+    Listening socket with SO_REUSEPORT, so every worker binds its own and the
+    kernel balances new connections across them.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class DrainingServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, memory_limit_mb: int = 0):
+        super().__init__(config)
+        self.memory_limit_mb = memory_limit_mb
+
+    async def on_tick(self, counter: int) -> bool:
+        if (
+            self.memory_limit_mb
+            and counter % _MEMORY_CHECK_TICKS == 0
+            and (rss := rss_mb()) > self.memory_limit_mb
+        ):
+            logger.warning(
+                "worker_memory_limit_reached",
+                rss_mb=round(rss),
+                limit_mb=self.memory_limit_mb,
+            )
+            return True
+        return await super().on_tick(counter)
+
+    async def shutdown(self, sockets=None):
+        # Imported here so the supervising process never loads the app
+        from app.websocket import manager
+
+        await manager.drain(settings.WS_DRAIN_TIMEOUT_SECONDS)
+        await super().shutdown(sockets=sockets)
+
+
+def max_requests_for_worker() -> int | None:
+    if not settings.WORKER_MAX_REQUESTS:
+        return None
+    return settings.WORKER_MAX_REQUESTS + random.randint(
+        0, settings.WORKER_MAX_REQUESTS_JITTER
+    )
+
+
+def run_worker(host: str, port: int, loop: LoopSetupType, http: HTTPProtocolType):
+    """Worker process body: own SO_REUSEPORT socket, one DrainingServer."""
+    sock = bind_reuseport(host, port, settings.SERVER_BACKLOG)
+    config = uvicorn.Config(
+        "app.main:app",
+        loop=loop,
+        http=http,
+        lifespan="on",
+        backlog=settings.SERVER_BACKLOG,
+        ws_max_size=settings.WS_PROTOCOL_MAX_FRAME_BYTES,
+        limit_max_requests=max_requests_for_worker(),
+        access_log=False,  # ObservabilityMiddleware logs requests
+        log_level=settings.LOG_LEVEL.lower(),
+    )
+    DrainingServer(config, settings.WORKER_MEMORY_LIMIT_MB).run(sockets=[sock])
+
+
+class Supervisor:
+    """Keeps `workers` worker processes running until told to stop."""
+
+    def __init__(
+        self,
+        workers: int,
+        host: str,
+        port: int,
+        loop: LoopSetupType,
+        http: HTTPProtocolType,
+    ):
+        self.workers = workers
+        self.args = (host, port, loop, http)
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: dict[int, tuple[BaseProcess, float]] = {}
+        self.stopping = False
+
+    def _spawn(self, index: int):
+        process = self.context.Process(
+            target=run_worker, args=self.args, name=f"worker-{index}"
+        )
+        process.start()
+        self.processes[index] = (process, time.monotonic())
+
+    def _handle_signal(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        for index in range(self.workers):
+            self._spawn(index)
+
+        while not self.stopping:
+            time.sleep(0.5)
+            for index, (process, started) in list(self.processes.items()):
+                if process.is_alive() or self.stopping:
+                    continue
+                crashed = process.exitcode != 0
+                logger.info(
+                    "worker_exited" if crashed else "worker_recycled",
+                    worker=index,
+                    pid=process.pid,
+                    exitcode=process.exitcode,
+                )
+                if crashed and time.monotonic() - started < _CRASH_WINDOW_SECONDS:
+                    time.sleep(1.0)
+                self._spawn(index)
+
+        self.stop()
+
+    def stop(self):
+        logger.info("server_stopping", workers=len(self.processes))
+        for process, _ in self.processes.values():
+            if process.is_alive():
+                process.terminate()  # SIGTERM: uvicorn drains, then exits
+        deadline = time.monotonic() + _STOP_GRACE_SECONDS
+        for process, _ in self.processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
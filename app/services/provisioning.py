@@ -0,0 +1,221 @@
+"""
+Bulk user provisioning, shared by the bulk registration API and the CLI.
+
+Usage:
+    python -m app.services.provisioning users.csv [--output results.json]
+
+The input is CSV with `email,password` columns, or JSON lines when the file
+ends in `.jsonl`.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import cache
+from app.core.database import SessionLocal, get_engine
+from app.core.logging import logger
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.schemas.auth import BulkUserResult, UserCreate
+
+_hash_pool: ProcessPoolExecutor | None = None
+
+
+def _hash_workers() -> int:
+    return settings.BULK_HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # forkserver: never fork a process that is running threads
+        method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=_hash_workers(),
+            mp_context=multiprocessing.get_context(method),
+        )
+    return _hash_pool
+
+
+def shutdown_hash_pool():
+    """Stop the hashing processes, if they were started."""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash passwords, spreading large batches across a process pool."""
+    workers = _hash_workers()
+    if workers <= 1 or len(passwords) < settings.BULK_HASH_PARALLEL_THRESHOLD:
+        return [get_password_hash(p) for p in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(_get_hash_pool().map(get_password_hash, passwords, chunksize=chunksize))
+
+
+def _insert_batch(db: Session, batch: list[tuple[int, str, str]]) -> dict[str, int]:
+    """Insert one batch, returning email -> id for the rows that were created."""
+    try:
+        rows = db.execute(
+            insert(User).returning(User.id, User.email),
+            [{"email": email, "hashed_password": hashed} for _, email, hashed in batch],
+        ).all()
+        db.commit()
+        return {email: user_id for user_id, email in rows}
+    except IntegrityError:
+        db.rollback()
+
+    # Someone registered one of these emails since the duplicate check;
+    # fall back to row-by-row inserts for this batch only.
+    created: dict[str, int] = {}
+    for _, email, hashed in batch:
+        try:
+            created[email] = db.execute(
+                insert(User)
+                .values(email=email, hashed_password=hashed)
+                .returning(User.id)
+            ).scalar_one()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+    return created
+
+
+def provision_users(db: Session, rows: list[dict[str, Any]]) -> list[BulkUserResult]:
+    """
+    Register many users at once.
+
+    Rows are validated individually, duplicates are found with a single
+    set-based query, passwords are hashed in parallel and inserts are
+    batched. Returns one result per input row, in input order.
+    """
+    results: dict[int, BulkUserResult] = {}
+    pending: list[tuple[int, str, str]] = []
+    seen: set[str] = set()
+
+    for index, row in enumerate(rows):
+        try:
+            user = UserCreate.model_validate(row)
+        except ValidationError as e:
+            results[index] = BulkUserResult(
+                index=index,
+                email=str(row.get("email", "")),
+                status="invalid",
+                error=e.errors()[0]["msg"],
+            )
+            continue
+
+        if user.email in seen:
+            results[index] = BulkUserResult(
+                index=index, email=user.email, status="duplicate"
+            )
+            continue
+        seen.add(user.email)
+        pending.append((index, user.email, user.password))
+
+    existing = (
+        set(db.scalars(select(User.email).where(User.email.in_(seen))))
+        if seen
+        else set()
+    )
+    to_create = [p for p in pending if p[1] not in existing]
+    hashes = hash_passwords([password for _, _, password in to_create])
+    to_create = [(index, email, h) for (index, email, _), h in zip(to_create, hashes)]
+
+    created: dict[str, int] = {}
+    for start in range(0, len(to_create), settings.BULK_INSERT_BATCH_SIZE):
+        created.update(
+            _insert_batch(db, to_create[start:start + settings.BULK_INSERT_BATCH_SIZE])
+        )
+
+    for index, email, _ in pending:
+        if email in created:
+            results[index] = BulkUserResult(
+                index=index, email=email, status="created", id=created[email]
+            )
+        else:
+            results[index] = BulkUserResult(
+                index=index, email=email, status="duplicate"
+            )
+
+    return [results[index] for index in range(len(rows))]
+
+
+async def cache_registrations(results: list[BulkUserResult]):
+    """Store registration events in Redis using pipelined batches."""
+    items = {
+        f"auth:registered:{r.id}": {"email": r.email}
+        for r in results
+        if r.status == "created"
+    }
+    if not items:
+        return
+    try:
+        await cache.set_many(
+            items, expire=3600, batch_size=settings.BULK_REDIS_BATCH_SIZE
+        )
+    except Exception as e:
+        # The database is the source of truth; don't fail the whole import
+        logger.warning("bulk_registration_cache_failed", error=str(e))
+
+
+def _read_rows(path: str) -> list[dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return list(csv.DictReader(f))
+
+
+async def _run(path: str, output: str | None):
+    rows = _read_rows(path)
+
+    await cache.connect()
+    db = SessionLocal(bind=get_engine())
+    try:
+        results = provision_users(db, rows)
+        await cache_registrations(results)
+    finally:
+        db.close()
+        await cache.disconnect()
+        shutdown_hash_pool()
+
+    summary = {
+        status: sum(r.status == status for r in results)
+        for status in ("created", "duplicate", "invalid")
+    }
+    print(json.dumps(summary))
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump([r.model_dump() for r in results], f, indent=2)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Bulk-register users.")
+    parser.add_argument("path", help="CSV (email,password) or .jsonl file")
+    parser.add_argument("--output", help="Write per-row results as JSON")
+    args = parser.parse_args(argv)
+
+    asyncio.run(_run(args.path, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from app.websocket.manager import manager
 from app.websocket.router import router
+from app.websocket.topics import topic_namespaces
 from app.websocket import handlers as _handlers  # noqa: F401 — registers @router.register handlers
 
-__all__ = ["manager", "router"]
+__all__ = ["manager", "router", "topic_namespaces"]
@@ -1,9 +1,18 @@
 from fastapi import WebSocket
 import structlog
 from datetime import datetime, timezone
+from pydantic import ValidationError
+from app.chat.fairness import ChatBusy
+from app.chat.service import complete
+from app.websocket.manager import manager
 from app.websocket.router import router
+from app.websocket.topics import topic_namespaces
 from app.core.cache import cache
-from app.schemas.websocket import ChatMessageResponse, StatusMessage
+from app.schemas.websocket import (
+    ChatMessageResponse,
+    StatusMessage,
+    SubscriptionMessage,
+)
 
 logger = structlog.get_logger()
 
@@ -43,9 +52,21 @@ async def handle_chat_message(
         ).model_dump(mode="json")
     )
 
-    response_content = (
-        f"Context: {context}, \nContext items: {len(context)}\nMessage: {content} "
-    )
+    try:
+        response_content = await complete(
+            user_id, request_id, model, content, context
+        )
+    except ChatBusy as e:
+        await websocket.send_json(
+            StatusMessage(
+                status="busy",
+                message="Server is busy, please retry",
+                retry_after=e.retry_after,
+                request_id=request_id,
+            ).model_dump(mode="json", exclude_none=True)
+        )
+        await websocket.send_json(StatusMessage(status="idle").model_dump(mode="json"))
+        return
 
     response = ChatMessageResponse(
         content=response_content, request_id=request_id, model=model
@@ -74,3 +95,48 @@ async def handle_ping(
     await websocket.send_json(
         {"type": "pong", "timestamp": datetime.now(timezone.utc).isoformat()}
     )
+
+
+@router.register("subscribe")
+@router.register("unsubscribe")
+async def handle_subscription(
+    message: dict, websocket: WebSocket, session_id: str, user_id: int
+):
+    try:
+        request = SubscriptionMessage.model_validate(message)
+    except ValidationError:
+        await router.send_error(
+            websocket,
+            "invalid_topic",
+            "topic must be 1-128 characters of letters, digits and _.:/-",
+            message.get("request_id"),
+        )
+        return
+
+    if request.type == "subscribe":
+        if not await topic_namespaces.can_subscribe(user_id, request.topic):
+            await router.send_error(
+                websocket,
+                "forbidden_topic",
+                "Not allowed to subscribe to this topic",
+                request.request_id,
+            )
+            return
+        if not manager.subscribe(session_id, request.topic):
+            await router.send_error(
+                websocket,
+                "too_many_topics",
+                "Subscription limit reached for this connection",
+                request.request_id,
+            )
+            return
+    else:
+        manager.unsubscribe(session_id, request.topic)
+
+    await websocket.send_json(
+        {
+            "type": f"{request.type}.ack",
+            "topic": request.topic,
+            "request_id": request.request_id,
+        }
+    )
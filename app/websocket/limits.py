@@ -0,0 +1,79 @@
+"""
+Per-connection inbound limits.
+
+Each connection gets an InboundLimiter: a token bucket per message type
+(WS_MESSAGE_RATES, else WS_MESSAGE_RATE_DEFAULT, holding
+WS_MESSAGE_BURST_SECONDS worth of messages) and a count of limit violations
+in the current WS_VIOLATION_WINDOW_SECONDS window. Frame size and in-flight
+caps are checked by the endpoint; every rejection goes through `violation()`,
+which says when the connection has earned a disconnect.
+"""
+
+import time
+from typing import Dict
+
+from app.config import settings
+from app.core.monitoring import ws_limit_violations_total
+
+# Limit violation reasons; also the error codes sent to the client
+FRAME_TOO_LARGE = "frame_too_large"
+INVALID_JSON = "invalid_json"
+RATE_LIMITED = "rate_limited"
+TOO_MANY_INFLIGHT = "too_many_inflight"
+
+_violations = {
+    reason: ws_limit_violations_total.labels(reason=reason)
+    for reason in (FRAME_TOO_LARGE, INVALID_JSON, RATE_LIMITED, TOO_MANY_INFLIGHT)
+}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class InboundLimiter:
+    __slots__ = ("buckets", "violations", "window_start")
+
+    def __init__(self):
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.violations = 0
+        self.window_start = time.monotonic()
+
+    def allow(self, message_type: str) -> bool:
+        """
+        Take a token for `message_type`. Callers pass registered handler
+        names (or one catch-all), so the bucket dict stays bounded.
+        """
+        bucket = self.buckets.get(message_type)
+        if bucket is None:
+            rate = settings.WS_MESSAGE_RATES.get(
+                message_type, settings.WS_MESSAGE_RATE_DEFAULT
+            )
+            capacity = max(1.0, rate * settings.WS_MESSAGE_BURST_SECONDS)
+            bucket = self.buckets[message_type] = TokenBucket(rate, capacity)
+        return bucket.take()
+
+    def violation(self, reason: str) -> bool:
+        """Count a violation; True once the connection should be closed."""
+        _violations[reason].inc()
+        now = time.monotonic()
+        if now - self.window_start > settings.WS_VIOLATION_WINDOW_SECONDS:
+            self.window_start = now
+            self.violations = 0
+        self.violations += 1
+        return self.violations >= settings.WS_MAX_VIOLATIONS
@@ -1,28 +1,81 @@
 from typing import Dict, Set, Optional
-from fastapi import WebSocket
+from collections import OrderedDict
+from contextlib import contextmanager
+from fastapi import WebSocket, status
 from datetime import datetime, timezone
 
 import asyncio
+import json
+import random
+import time
 import structlog
+from app.config import settings
 from app.core.cache import cache
+from app.core.monitoring import (
+    ws_connections_active,
+    ws_drain_connections_closed_total,
+    ws_drain_duration_seconds,
+    ws_draining,
+    ws_handlers_inflight,
+    ws_heartbeat_sweep_duration_seconds,
+    ws_publish_recipients,
+    ws_topic_subscribers,
+    ws_topics_active,
+    ws_users_active,
+)
+from app.schemas.websocket import StatusMessage
+from app.websocket.topics import topic_namespaces
 
 logger = structlog.get_logger()
 
 
+class Connection:
+    """Everything the node knows about one open WebSocket."""
+
+    __slots__ = (
+        "session_id",
+        "websocket",
+        "user_id",
+        "connected_at",
+        "last_seen",
+        "messages_received",
+        "topics",
+    )
+
+    def __init__(self, session_id: str, websocket: WebSocket, user_id: int):
+        self.session_id = session_id
+        self.websocket = websocket
+        self.user_id = user_id
+        self.connected_at = time.time()
+        self.last_seen = time.monotonic()
+        self.messages_received = 0
+        # Topic -> namespace metric label at subscribe time; created on first use
+        self.topics: Optional[Dict[str, str]] = None
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        # Ordered by last_seen (touch moves a session to the end), so stale
+        # sessions are always at the front
+        self.connections: "OrderedDict[str, Connection]" = OrderedDict()
         self.user_sessions: Dict[int, Set[str]] = {}
+        self.topic_sessions: Dict[str, Set[str]] = {}
         self.heartbeat_task: Optional[asyncio.Task] = None
+        # Drain state: no new connections once set
+        self.draining = False
+        self.inflight: Dict[str, int] = {}
+        self._inflight_total = 0
+        self._idle: Optional[asyncio.Future] = None
 
     async def connect(self, websocket: WebSocket, session_id: str, user_id: int):
         await websocket.accept()
 
-        self.active_connections[session_id] = websocket
+        self.connections[session_id] = Connection(session_id, websocket, user_id)
 
         if user_id not in self.user_sessions:
             self.user_sessions[user_id] = set()
         self.user_sessions[user_id].add(session_id)
+        self._update_gauges()
 
         await cache.set(
             f"ws:session:{session_id}",
@@ -39,23 +92,208 @@ class ConnectionManager:
         if not self.heartbeat_task:
             self.heartbeat_task = asyncio.create_task(self.heartbeat_monitor())
 
-    async def disconnect(self, session_id: str, user_id: int):
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
+    def touch(self, session_id: str):
+        """Record activity on a session: any message counts as a heartbeat."""
+        connection = self.connections.get(session_id)
+        if connection is not None:
+            connection.last_seen = time.monotonic()
+            connection.messages_received += 1
+            self.connections.move_to_end(session_id)
+
+    async def disconnect(self, session_id: str):
+        connection = self.connections.pop(session_id, None)
+        if connection is None:
+            return  # Already cleaned up (e.g. by a drain)
+        user_id = connection.user_id
+        for topic, namespace in (connection.topics or {}).items():
+            self._remove_subscriber(topic, session_id, namespace)
 
         if user_id in self.user_sessions:
             self.user_sessions[user_id].discard(session_id)
             if not self.user_sessions[user_id]:
                 del self.user_sessions[user_id]
+        self._update_gauges()
 
         await cache.delete(f"ws:session:{session_id}")
 
         logger.info("websocket_disconnected", session_id=session_id, user_id=user_id)
 
+    def subscribe(self, session_id: str, topic: str) -> bool:
+        """
+        Add the session to the topic. False if the session is unknown or
+        already holds WS_MAX_TOPICS_PER_CONNECTION subscriptions. Callers
+        acting for a client check topic_namespaces.can_subscribe first.
+        """
+        connection = self.connections.get(session_id)
+        if connection is None:
+            return False
+        if connection.topics is None:
+            connection.topics = {}
+        elif topic in connection.topics:
+            return True
+        if len(connection.topics) >= settings.WS_MAX_TOPICS_PER_CONNECTION:
+            return False
+
+        # Kept so the decrement uses the same label even if namespaces change
+        namespace = connection.topics[topic] = topic_namespaces.namespace(topic)
+        sessions = self.topic_sessions.get(topic)
+        if sessions is None:
+            sessions = self.topic_sessions[topic] = set()
+            ws_topics_active.inc()
+        sessions.add(session_id)
+        ws_topic_subscribers.labels(namespace=namespace).inc()
+        return True
+
+    def unsubscribe(self, session_id: str, topic: str) -> bool:
+        connection = self.connections.get(session_id)
+        if connection is None or connection.topics is None:
+            return False
+        namespace = connection.topics.pop(topic, None)
+        if namespace is None:
+            return False
+        self._remove_subscriber(topic, session_id, namespace)
+        return True
+
+    def _remove_subscriber(self, topic: str, session_id: str, namespace: str):
+        sessions = self.topic_sessions.get(topic)
+        if sessions is None or session_id not in sessions:
+            return
+        sessions.discard(session_id)
+        ws_topic_subscribers.labels(namespace=namespace).dec()
+        if not sessions:
+            del self.topic_sessions[topic]
+            ws_topics_active.dec()
+
+    async def publish(
+        self, topic: str, message: dict, exclude: Optional[Set[str]] = None
+    ) -> int:
+        """Send `message` to every subscriber of `topic`; returns how many."""
+        sessions = self.topic_sessions.get(topic)
+        if not sessions:
+            ws_publish_recipients.observe(0)
+            return 0
+        # Serialized once for all subscribers, the way send_json would
+        text = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        targets = [
+            self.connections[session_id]
+            for session_id in sessions
+            if not exclude or session_id not in exclude
+        ]
+        await asyncio.gather(*(self._send_text(c, text) for c in targets))
+        ws_publish_recipients.observe(len(targets))
+        return len(targets)
+
+    async def _send_text(self, connection: Connection, text: str):
+        try:
+            await connection.websocket.send_text(text)
+        except Exception as e:
+            logger.error(
+                "send_message_failed", session_id=connection.session_id, error=str(e)
+            )
+
+    @contextmanager
+    def handling(self, session_id: str):
+        """Mark a message handler as in flight, so a drain waits for it."""
+        self.inflight[session_id] = self.inflight.get(session_id, 0) + 1
+        self._inflight_total += 1
+        ws_handlers_inflight.inc()
+        try:
+            yield
+        finally:
+            self.inflight[session_id] -= 1
+            if not self.inflight[session_id]:
+                del self.inflight[session_id]
+            self._inflight_total -= 1
+            ws_handlers_inflight.dec()
+            if not self._inflight_total and self._idle and not self._idle.done():
+                self._idle.set_result(None)
+
+    async def drain(self, timeout: float):
+        """
+        Stop accepting connections, tell every client to reconnect after a
+        jittered delay, wait up to `timeout` for in-flight handlers, then
+        close all sockets and remove their presence keys.
+        """
+        if self.draining:
+            return
+        self.draining = True
+        ws_draining.set(1)
+        start = time.monotonic()
+        sessions = [
+            (session_id, connection.websocket)
+            for session_id, connection in self.connections.items()
+        ]
+        logger.info(
+            "websocket_drain_started",
+            connections=len(sessions),
+            inflight=self._inflight_total,
+        )
+
+        await asyncio.gather(
+            *(self._send_reconnect(session_id, ws) for session_id, ws in sessions)
+        )
+
+        if self._inflight_total:
+            self._idle = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._idle, timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "websocket_drain_deadline", inflight=self._inflight_total
+                )
+
+        for session_id, ws in sessions:
+            outcome = "deadline" if session_id in self.inflight else "clean"
+            ws_drain_connections_closed_total.labels(outcome=outcome).inc()
+            try:
+                await ws.close(code=status.WS_1012_SERVICE_RESTART)
+            except Exception:
+                pass
+        # Presence writes are flushed before Redis is disconnected
+        await asyncio.gather(
+            *(self.disconnect(session_id) for session_id, _ in sessions),
+            return_exceptions=True,
+        )
+        await self.stop_heartbeat()
+
+        duration = time.monotonic() - start
+        ws_drain_duration_seconds.set(duration)
+        ws_draining.set(0)
+        logger.info(
+            "websocket_drain_complete",
+            connections=len(sessions),
+            duration=f"{duration:.3f}s",
+        )
+
+    async def _send_reconnect(self, session_id: str, websocket: WebSocket):
+        # Spread reconnects so surviving nodes don't take them all at once
+        retry_after = random.uniform(
+            settings.WS_RECONNECT_MIN_SECONDS, settings.WS_RECONNECT_MAX_SECONDS
+        )
+        message = StatusMessage(
+            status="reconnect",
+            message="Server restarting",
+            retry_after=round(retry_after, 3),
+        )
+        await self.send_personal_message(
+            message.model_dump(mode="json", exclude_none=True), session_id
+        )
+
+    async def stop_heartbeat(self):
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            await asyncio.gather(self.heartbeat_task, return_exceptions=True)
+            self.heartbeat_task = None
+
+    def _update_gauges(self):
+        ws_connections_active.set(len(self.connections))
+        ws_users_active.set(len(self.user_sessions))
+
     async def send_personal_message(self, message: dict, session_id: str):
-        if session_id in self.active_connections:
+        connection = self.connections.get(session_id)
+        if connection is not None:
             try:
-                await self.active_connections[session_id].send_json(message)
+                await connection.websocket.send_json(message)
             except Exception as e:
                 logger.error("send_message_failed", session_id=session_id, error=str(e))
 
@@ -66,45 +304,41 @@ class ConnectionManager:
 
     async def broadcast(self, message: dict, exclude: Optional[Set[str]] = None):
         exclude = exclude or set()
-        for session_id in self.active_connections:
+        for session_id in list(self.connections):
             if session_id not in exclude:
                 await self.send_personal_message(message, session_id)
 
     async def heartbeat_monitor(self):
         while True:
-            await asyncio.sleep(30)
-
-            now = datetime.now(timezone.utc)
-            stale_sessions = []
-            stale_session_data: dict = {}
-
-            for session_id in list(self.active_connections.keys()):
-                session_data = await cache.get(f"ws:session:{session_id}")
-
-                if session_data:
-                    last_heartbeat = datetime.fromisoformat(
-                        session_data["last_heartbeat"]
-                    )
-                    if (now - last_heartbeat).total_seconds() > 90:
-                        stale_sessions.append(session_id)
-                        stale_session_data[session_id] = session_data
-                else:
-                    stale_sessions.append(session_id)
-                    stale_session_data[session_id] = None
-
-            for session_id in stale_sessions:
-                logger.warning("stale_session_detected", session_id=session_id)
-                if session_id in self.active_connections:
-                    try:
-                        await self.active_connections[session_id].close()
-                    except Exception:
-                        pass
-
-                session_data = stale_session_data.get(session_id)
-                if session_data:
-                    await self.disconnect(session_id, int(session_data["user_id"]))
-                else:
-                    self.active_connections.pop(session_id, None)
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL_SECONDS)
+            try:
+                await self.check_heartbeats()
+            except Exception as e:
+                logger.warning("heartbeat_sweep_failed", error=str(e))
+
+    async def check_heartbeats(self):
+        """Close sessions that have sent nothing for the heartbeat timeout."""
+        start = time.perf_counter()
+        cutoff = time.monotonic() - settings.WS_HEARTBEAT_TIMEOUT_SECONDS
+        stale = []
+        for connection in self.connections.values():
+            if connection.last_seen > cutoff:
+                break  # Everything after this was seen more recently
+            stale.append(connection)
+
+        for connection in stale:
+            logger.warning(
+                "stale_session_detected",
+                session_id=connection.session_id,
+                user_id=connection.user_id,
+            )
+            try:
+                await connection.websocket.close()
+            except Exception:
+                pass
+            await self.disconnect(connection.session_id)
+
+        ws_heartbeat_sweep_duration_seconds.observe(time.perf_counter() - start)
 
 
 manager = ConnectionManager()
@@ -0,0 +1,52 @@
+"""
+WebSocket proxy that meters frame sizes and send latency.
+"""
+
+import json
+import time
+from typing import Any
+
+from fastapi import WebSocket
+
+from app.core.monitoring import ws_frame_size_bytes, ws_send_duration_seconds
+
+_frames_in = ws_frame_size_bytes.labels(direction="in")
+_frames_out = ws_frame_size_bytes.labels(direction="out")
+
+
+def _size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode())
+
+
+class MeteredWebSocket:
+    """
+    Wraps a Starlette WebSocket; handlers use it exactly like the original.
+
+    JSON is serialized the same way Starlette does (compact, non-ASCII kept)
+    so the recorded size is the size on the wire.
+    """
+
+    __slots__ = ("websocket",)
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.websocket, name)
+
+    async def receive_text(self) -> str:
+        text = await self.websocket.receive_text()
+        _frames_in.observe(_size(text))
+        return text
+
+    async def send_text(self, data: str):
+        start = time.perf_counter()
+        await self.websocket.send_text(data)
+        ws_send_duration_seconds.observe(time.perf_counter() - start)
+        _frames_out.observe(_size(data))
+
+    async def send_json(self, data: Any, mode: str = "text"):
+        if mode != "text":
+            await self.websocket.send_json(data, mode=mode)
+            return
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
@@ -1,6 +1,17 @@
 from typing import Callable, Dict
 from fastapi import WebSocket
+from starlette.concurrency import run_in_threadpool
+import time
 import structlog
+from app.core.tracing import tracer
+from app.core.monitoring import ws_message_duration_seconds, ws_messages_total
+from app.core.profiling import (
+    PROFILING_ENABLED,
+    finish_profile,
+    profile_store,
+    start_current_thread_profile,
+)
+from app.dependencies import is_active_superuser
 from app.schemas.websocket import (
     ErrorMessage,
 )
@@ -21,31 +32,84 @@ class MessageRouter:
 
     async def route(
         self, message: dict, websocket: WebSocket, session_id: str, user_id: int
+    ):
+        # Each message is its own trace root; the connection is not a span
+        with tracer.span("ws.message", session_id=session_id) as span:
+            await self._route(message, websocket, session_id, user_id, span)
+
+    async def _route(
+        self, message: dict, websocket: WebSocket, session_id: str, user_id: int, span
     ):
         message_type = message.get("type")
 
         if not message_type:
+            ws_messages_total.labels(type="missing", outcome="missing_type").inc()
             await self.send_error(websocket, "missing_type", "Message type is required")
             return
 
-        handler = self.handlers.get(message_type)
+        handler = (
+            self.handlers.get(message_type) if isinstance(message_type, str) else None
+        )
 
         if not handler:
+            ws_messages_total.labels(type="unknown", outcome="unknown_type").inc()
             await self.send_error(
                 websocket, "unknown_type", f"Unknown message type: {message_type}"
             )
             return
 
+        profiler = None
+        if PROFILING_ENABLED and message.get("profile") is True:
+            # Same rules as the X-Profile header: superusers, one profile at a time
+            if await run_in_threadpool(is_active_superuser, user_id):
+                profiler = start_current_thread_profile()
+            if profiler is None:
+                await self.send_error(
+                    websocket,
+                    "profile_unavailable",
+                    "Profiling needs a superuser and no other running profile",
+                    message.get("request_id"),
+                )
+
+        span.set_attribute("type", message_type)
+        start = time.perf_counter()
+        error = None
         try:
-            await handler(message, websocket, session_id, user_id)
+            with tracer.span("ws.handler", type=message_type):
+                await handler(message, websocket, session_id, user_id)
         except Exception as e:
-            logger.error("message_handler_error", type=message_type, error=str(e))
+            error = e
+        duration = time.perf_counter() - start
+
+        if profiler is not None:
+            profile_id = profile_store.add(await finish_profile(profiler))
+            await websocket.send_json(
+                {
+                    "type": "profile",
+                    "profile_id": profile_id,
+                    "request_id": message.get("request_id"),
+                }
+            )
+
+        # `message_type` is a registered handler name here, so labels stay bounded
+        outcome = "ok" if error is None else "handler_error"
+        ws_messages_total.labels(type=message_type, outcome=outcome).inc()
+        ws_message_duration_seconds.labels(type=message_type, outcome=outcome).observe(
+            duration
+        )
+
+        if error is not None:
+            logger.error("message_handler_error", type=message_type, error=str(error))
             await self.send_error(
-                websocket, "handler_error", str(e), message.get("request_id")
+                websocket, "handler_error", str(error), message.get("request_id")
             )
 
     async def send_error(
-        self, websocket: WebSocket, code: str, error: str, request_id: str = None
+        self,
+        websocket: WebSocket,
+        code: str,
+        error: str,
+        request_id: str | None = None,
     ):
         error_msg = ErrorMessage(error=error, code=code, request_id=request_id)
         await websocket.send_json(error_msg.model_dump(mode="json"))
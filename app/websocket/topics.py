@@ -0,0 +1,47 @@
+"""
+Topic namespaces and who may subscribe to them.
+
+A topic is `<namespace>:<key>`, e.g. `user:42`. A client can only subscribe
+to topics in a namespace with a registered authorizer, and only when that
+authorizer allows its user. The registered namespaces are also the only
+values of the `namespace` label on topic metrics.
+"""
+
+from typing import Awaitable, Callable, Dict
+
+# (user_id, key) -> may this user subscribe to `<namespace>:<key>`?
+TopicAuthorizer = Callable[[int, str], Awaitable[bool]]
+
+# Metric label for topics outside every registered namespace
+OTHER_NAMESPACE = "other"
+
+
+class TopicNamespaces:
+    def __init__(self):
+        self.authorizers: Dict[str, TopicAuthorizer] = {}
+
+    def register(self, namespace: str):
+        def decorator(func: TopicAuthorizer):
+            self.authorizers[namespace] = func
+            return func
+
+        return decorator
+
+    def namespace(self, topic: str) -> str:
+        """The topic's namespace if registered, else OTHER_NAMESPACE."""
+        namespace = topic.partition(":")[0]
+        return namespace if namespace in self.authorizers else OTHER_NAMESPACE
+
+    async def can_subscribe(self, user_id: int, topic: str) -> bool:
+        namespace, _, key = topic.partition(":")
+        authorizer = self.authorizers.get(namespace)
+        return authorizer is not None and bool(key) and await authorizer(user_id, key)
+
+
+topic_namespaces = TopicNamespaces()
+
+
+@topic_namespaces.register("user")
+async def _own_user_topic(user_id: int, key: str) -> bool:
+    # Events for one user's own sessions (e.g. across editor windows)
+    return key == str(user_id)
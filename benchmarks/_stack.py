@@ -0,0 +1,269 @@
+"""
+Local stand-in stack for the load benchmarks: the real app served by uvicorn,
+with an in-memory Redis stand-in and a SQLite database.
+
+Run a server on its own (the load tools normally start it for you):
+
+    python -m benchmarks._stack --port 8001 [--db /tmp/bench.db] [--redis-latency-ms 0.2]
+
+MemoryRedis implements the subset of `redis.asyncio.Redis` (with
+decode_responses=True) the app uses: strings with expiry, pipelines,
+SCAN/MGET and pub/sub. Every call yields to the loop, and an optional
+per-call delay approximates a network round trip.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+
+class MemoryRedis:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._data: dict[str, tuple[str, float | None]] = {}
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    async def _roundtrip(self):
+        await asyncio.sleep(self.latency)
+
+    def _live(self, key: str) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _set(self, key: str, value, ex: int | None = None):
+        expires_at = time.monotonic() + ex if ex else None
+        self._data[key] = (str(value), expires_at)
+
+    async def ping(self) -> bool:
+        await self._roundtrip()
+        return True
+
+    async def get(self, key: str) -> str | None:
+        await self._roundtrip()
+        return self._live(key)
+
+    async def set(self, key: str, value, ex: int | None = None) -> bool:
+        await self._roundtrip()
+        self._set(key, value, ex)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        await self._roundtrip()
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def exists(self, *keys: str) -> int:
+        await self._roundtrip()
+        return sum(self._live(key) is not None for key in keys)
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        await self._roundtrip()
+        return [self._live(key) for key in keys]
+
+    async def scan_iter(self, match: str = "*", count: int | None = None):
+        for key in list(self._data):
+            if fnmatch.fnmatchcase(key, match) and self._live(key) is not None:
+                yield key
+
+    async def publish(self, channel: str, message: str) -> int:
+        await self._roundtrip()
+        queues = self._subscribers.get(channel, ())
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return len(queues)
+
+    def pipeline(self, transaction: bool = True) -> "_Pipeline":
+        return _Pipeline(self)
+
+    def pubsub(self) -> "_PubSub":
+        return _PubSub(self)
+
+    async def close(self):
+        pass
+
+    aclose = close
+
+
+class _Pipeline:
+    def __init__(self, redis: MemoryRedis):
+        self._redis = redis
+        self._ops: list[tuple] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._ops.clear()
+
+    def set(self, key: str, value, ex: int | None = None):
+        self._ops.append((key, value, ex))
+        return self
+
+    async def execute(self) -> list[bool]:
+        await self._redis._roundtrip()
+        for key, value, ex in self._ops:
+            self._redis._set(key, value, ex)
+        results = [True] * len(self._ops)
+        self._ops.clear()
+        return results
+
+
+class _PubSub:
+    def __init__(self, redis: MemoryRedis):
+        self._redis = redis
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._channels: list[str] = []
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self._redis._subscribers.setdefault(channel, set()).add(self._queue)
+            self._channels.append(channel)
+
+    async def listen(self):
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self):
+        for channel in self._channels:
+            self._redis._subscribers.get(channel, set()).discard(self._queue)
+        self._channels.clear()
+
+
+# -----------------------------------
+# Server process helpers (used by the load tools)
+# -----------------------------------
+def raise_fd_limit():
+    """Thousands of sockets need more than the usual 1024 descriptors."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env: dict[str, str] | None = None, redis_latency_ms: float = 0.0):
+    """Start `python -m benchmarks._stack` and wait until it serves /health/."""
+    db = tempfile.NamedTemporaryFile(prefix="bench-", suffix=".db", delete=False).name
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks._stack",
+            "--port",
+            str(port),
+            "--db",
+            db,
+            "--redis-latency-ms",
+            str(redis_latency_ms),
+        ],
+        env={**os.environ, **(env or {})},
+    )
+    process.db_path = db
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"benchmark server exited with {process.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/v1/health/", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("benchmark server did not start")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    if os.path.exists(process.db_path):
+        os.remove(process.db_path)
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def metric_value(port: int, name: str, **labels: str) -> float:
+    """Sum of a sample (e.g. `foo_sum`) across series matching `labels`."""
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as r:
+        text = r.read().decode()
+    total = 0.0
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        metric, _, label_text = series.partition("{")
+        if metric == name and all(f'{k}="{v}"' in label_text for k, v in labels.items()):
+            total += float(value)
+    return total
+
+
+def percentiles(values: list[float], points=(50, 99, 99.9)) -> dict[str, float]:
+    """Nearest-rank percentiles, in milliseconds."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for point in points:
+        index = min(len(ordered) - 1, max(0, round(point / 100 * len(ordered)) - 1))
+        result[f"p{point:g}".replace(".", "")] = round(ordered[index] * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app on a stand-in stack")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench.db"))
+    parser.add_argument("--redis-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Must be set before the app (and its settings) are imported
+    os.environ["DATABASE_URL_OVERRIDE"] = f"sqlite:///{args.db}"
+    os.environ["ENVIRONMENT"] = "development"  # create tables at startup
+    os.environ.setdefault("DEBUG", "false")  # no SQL echo
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("WARMUP_ENABLED", "false")
+
+    import uvicorn
+
+    from app.core.cache import cache
+
+    async def connect():
+        cache.redis = MemoryRedis(args.redis_latency_ms / 1000)
+
+    cache.connect = connect
+
+    from app.main import app
+    from app.server import DrainingServer
+
+    raise_fd_limit()
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=args.port, access_log=False, log_level="warning"
+    )
+    DrainingServer(config).run()
+
+
+if __name__ == "__main__":
+    main()
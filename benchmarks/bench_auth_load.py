@@ -0,0 +1,362 @@
+"""
+HTTP auth path load benchmark with a loop-blocking gate.
+
+Starts the app on the stand-in stack (benchmarks._stack) and drives
+POST /api/v1/auth/register and /api/v1/auth/login from `--concurrency`
+clients for `--duration` seconds. A separate probe requests
+/api/v1/health/ every `--canary-interval-ms` throughout: it does no work
+itself, so its latency is the time spent queued behind whatever holds the
+event loop. Reports:
+
+- throughput, status counts and p50/p99/p999 per endpoint
+- event loop blocked time (event_loop_blocked_seconds_total, counted past
+  `--block-threshold-ms`) and the loop lag distribution
+- p99 of the /health/ canary
+
+Error rate and the event loop blocked fraction have fixed limits, which
+hold on any hardware. Throughput and the p99s are compared against the
+baseline in benchmarks/auth_baseline.json, within its tolerances. That
+comparison only means something on the machine the baseline was recorded on,
+with the same settings. When the CPU count, architecture or benchmark config
+differs, it is refused rather than run. Record the baseline with
+--record-baseline on the machine that runs the gate, and again after an
+intended change.
+
+Exit status: 0 all checks pass, 1 a check failed, 2 no comparable baseline
+(fixed limits still checked and reported).
+
+Usage:
+    python -m benchmarks.bench_auth_load [--concurrency 32] [--duration 20]
+        [--register-share 0.2] [--users 50] [--redis-latency-ms 0.2]
+        [--baseline PATH] [--record-baseline] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+
+from benchmarks._stack import (
+    free_port,
+    metric_value,
+    percentiles,
+    start_server,
+    stop_server,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "auth_baseline.json")
+PASSWORD = "bench-password-1"
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _email() -> str:
+    return f"bench-{uuid.uuid4().hex[:12]}@loadtest.io"
+
+
+class LoopMetrics:
+    """Snapshot of the server's loop metrics, for before/after deltas."""
+
+    def __init__(self, port: int):
+        self.blocked_seconds = metric_value(port, "event_loop_blocked_seconds_total")
+        self.episodes = metric_value(port, "event_loop_blocked_total")
+        self.lag_count = metric_value(port, "event_loop_lag_seconds_count")
+        self.lag_sum = metric_value(port, "event_loop_lag_seconds_sum")
+        self.lag_buckets = [
+            metric_value(port, "event_loop_lag_seconds_bucket", le=str(bound))
+            for bound in LAG_BUCKETS
+        ]
+
+    def delta(self, before: "LoopMetrics", seconds: float) -> dict:
+        samples = self.lag_count - before.lag_count
+        buckets = [a - b for a, b in zip(self.lag_buckets, before.lag_buckets)]
+        blocked = self.blocked_seconds - before.blocked_seconds
+        return {
+            "blocked_seconds": round(blocked, 3),
+            "blocked_fraction": round(blocked / seconds, 4),
+            "blocked_episodes": int(self.episodes - before.episodes),
+            "lag_mean_ms": (
+                round((self.lag_sum - before.lag_sum) / samples * 1000, 3)
+                if samples
+                else None
+            ),
+            "lag_p99_ms": _bucket_quantile(buckets, samples, 0.99),
+        }
+
+
+def _bucket_quantile(buckets: list[float], count: float, q: float) -> float | None:
+    """Upper bound of the bucket holding the q-quantile (None past the last)."""
+    if not count:
+        return None
+    for bound, cumulative in zip(LAG_BUCKETS, buckets):
+        if cumulative >= q * count:
+            return bound * 1000
+    return None
+
+
+async def _register(client: httpx.AsyncClient, email: str) -> int:
+    response = await client.post(
+        "/api/v1/auth/register", json={"email": email, "password": PASSWORD}
+    )
+    return response.status_code
+
+
+async def _login(client: httpx.AsyncClient, email: str) -> int:
+    response = await client.post(
+        "/api/v1/auth/login", json={"email": email, "password": PASSWORD}
+    )
+    return response.status_code
+
+
+async def _client_loop(client, users: list[str], args, deadline: float, stats: dict):
+    while time.monotonic() < deadline:
+        if random.random() < args.register_share:
+            endpoint, email = "register", _email()
+        else:
+            endpoint, email = "login", random.choice(users)
+        start = time.perf_counter()
+        try:
+            status = await (_register if endpoint == "register" else _login)(
+                client, email
+            )
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        stats["latency"][endpoint].append(time.perf_counter() - start)
+        stats["status"][endpoint][str(status)] += 1
+        if endpoint == "register" and status == 201:
+            users.append(email)
+
+
+async def _canary(client: httpx.AsyncClient, interval: float, stop: asyncio.Event, out):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/api/v1/health/")
+            out.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            out.append(float("inf"))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args) -> dict:
+    port = free_port()
+    server = start_server(
+        port,
+        env={
+            "LOG_LEVEL": "ERROR",  # every stall would otherwise log its stack
+            "LOOP_MONITOR_INTERVAL_SECONDS": str(args.block_threshold_ms / 2000),
+            "LOOP_BLOCK_THRESHOLD_SECONDS": str(args.block_threshold_ms / 1000),
+        },
+        redis_latency_ms=args.redis_latency_ms,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    stats = {
+        "latency": defaultdict(list),
+        "status": defaultdict(Counter),
+    }
+    canary: list[float] = []
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url, limits=limits, timeout=60
+        ) as client, httpx.AsyncClient(base_url=base_url, timeout=60) as probe:
+            # Seed accounts to log in with; not part of the measurement
+            users = [_email() for _ in range(args.users)]
+            seed = asyncio.Semaphore(args.concurrency)
+
+            async def seed_one(email):
+                async with seed:
+                    await _register(client, email)
+
+            await asyncio.gather(*(seed_one(email) for email in users))
+
+            before = LoopMetrics(port)
+            stop = asyncio.Event()
+            canary_task = asyncio.create_task(
+                _canary(probe, args.canary_interval_ms / 1000, stop, canary)
+            )
+            start = time.perf_counter()
+            deadline = time.monotonic() + args.duration
+            await asyncio.gather(
+                *(
+                    _client_loop(client, users, args, deadline, stats)
+                    for _ in range(args.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await canary_task
+            loop = LoopMetrics(port).delta(before, elapsed)
+    finally:
+        stop_server(server)
+
+    total = sum(len(values) for values in stats["latency"].values())
+    errors = sum(
+        count
+        for counts in stats["status"].values()
+        for status, count in counts.items()
+        if not status.startswith("2")
+    )
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "register_share": args.register_share,
+            "users": args.users,
+            "redis_latency_ms": args.redis_latency_ms,
+            "block_threshold_ms": args.block_threshold_ms,
+        },
+        "requests": {
+            "total": total,
+            "per_second": round(total / elapsed, 1),
+            "error_rate": round(errors / total, 4) if total else None,
+        },
+        "endpoints": {
+            endpoint: {
+                "count": len(values),
+                "per_second": round(len(values) / elapsed, 1),
+                "status": dict(stats["status"][endpoint]),
+                **percentiles(values),
+            }
+            for endpoint, values in sorted(stats["latency"].items())
+        },
+        "event_loop": loop,
+        "health_canary": {"count": len(canary), **percentiles(canary)},
+    }
+
+
+def machine() -> dict:
+    """What the baseline numbers depend on besides the code."""
+    cpus = (
+        len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    )
+    return {"cpu_count": cpus, "arch": platform.machine()}
+
+
+def baseline_from(results: dict) -> dict:
+    """The measurements `check` compares later runs against."""
+    return {
+        "requests_per_second": results["requests"]["per_second"],
+        "p99_ms": {
+            endpoint: values["p99"]
+            for endpoint, values in results["endpoints"].items()
+        },
+        "health_p99_ms": results["health_canary"]["p99"],
+        "config": results["config"],
+        "machine": machine(),
+    }
+
+
+def incomparable(results: dict, baseline: dict) -> str | None:
+    """Why `results` can't be compared with `baseline`, if they can't."""
+    if not baseline:
+        return "no baseline recorded"
+    if baseline.get("machine") != machine():
+        return f"baseline recorded on {baseline.get('machine')}, this is {machine()}"
+    if baseline.get("config") != results["config"]:
+        return f"baseline recorded with {baseline.get('config')}, this run used {results['config']}"
+    return None
+
+
+def check_limits(results: dict, gate: dict) -> list[str]:
+    """Failures against the fixed, hardware-independent limits."""
+    failures = []
+    error_rate = results["requests"]["error_rate"] or 0.0
+    if error_rate > gate["max_error_rate"]:
+        failures.append(f"error rate {error_rate} above {gate['max_error_rate']}")
+    fraction = results["event_loop"]["blocked_fraction"]
+    if fraction > gate["max_loop_blocked_fraction"]:
+        failures.append(
+            f"event loop blocked {fraction:.1%} of the run, "
+            f"limit {gate['max_loop_blocked_fraction']:.1%}"
+        )
+    return failures
+
+
+def check_baseline(results: dict, gate: dict) -> list[str]:
+    """Failures against the recorded baseline; only for comparable runs."""
+    failures = []
+    baseline, tolerance = gate["baseline"], gate["tolerance"]
+
+    rps = results["requests"]["per_second"]
+    floor = round(baseline["requests_per_second"] * (1 - tolerance["requests_per_second"]), 1)
+    if rps < floor:
+        failures.append(
+            f"throughput {rps}/s below {floor}/s "
+            f"(baseline {baseline['requests_per_second']}/s)"
+        )
+    for endpoint, recorded in baseline["p99_ms"].items():
+        p99 = results["endpoints"].get(endpoint, {}).get("p99")
+        limit = round(recorded * (1 + tolerance["p99_ms"]))
+        if p99 is not None and p99 > limit:
+            failures.append(
+                f"{endpoint} p99 {p99} ms above {limit} ms (baseline {recorded} ms)"
+            )
+    canary_p99 = results["health_canary"].get("p99")
+    limit = round(baseline["health_p99_ms"] * (1 + tolerance["health_p99_ms"]))
+    if canary_p99 is not None and canary_p99 > limit:
+        failures.append(
+            f"/health/ p99 {canary_p99} ms above {limit} ms "
+            f"(baseline {baseline['health_p99_ms']} ms)"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--register-share", type=float, default=0.2)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--redis-latency-ms", type=float, default=0.2)
+    parser.add_argument("--block-threshold-ms", type=float, default=20.0)
+    parser.add_argument("--canary-interval-ms", type=float, default=50.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--record-baseline",
+        action="store_true",
+        help="Store this run as the baseline (keeping the tolerances) instead of checking",
+    )
+    parser.add_argument("--output", help="Also write the results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    with open(args.baseline) as f:
+        gate = json.load(f)
+    if args.record_baseline:
+        gate["baseline"] = baseline_from(results)
+        with open(args.baseline, "w") as f:
+            json.dump(gate, f, indent=2)
+            f.write("\n")
+        print(f"Baseline recorded in {args.baseline}")
+        return
+    failures = check_limits(results, gate)
+    reason = incomparable(results, gate["baseline"])
+    if reason is None:
+        failures += check_baseline(results, gate)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    if reason is not None:
+        print(f"NO BASELINE: {reason}; re-record with --record-baseline on this machine")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Chat micro-batching benchmark.
+
+Drives `--requests` chat prompts from `--concurrency` simulated sessions
+through BatchScheduler on the fake backend (one batch at a time, a fixed
+cost per batch plus a cost per prompt) and compares throughput and latency
+for each max batch size. Runs in-process; no server or sockets.
+
+Usage:
+    python -m benchmarks.bench_chat_batching [--requests 1000] [--concurrency 64]
+        [--batch-sizes 1,4,16,32] [--max-wait-ms 5] [--models 2]
+        [--batch-ms 20] [--item-ms 2]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from benchmarks._stack import percentiles
+
+from app.chat.backends import FakeBackend
+from app.chat.batching import BatchScheduler
+
+
+async def run_one(args, max_batch_size: int) -> dict:
+    backend = FakeBackend(args.batch_ms / 1000, args.item_ms / 1000)
+    scheduler = BatchScheduler(
+        backend, max_batch_size, args.max_wait_ms / 1000, max_concurrency=1
+    )
+    latencies: list[float] = []
+    remaining = iter(range(args.requests))
+
+    async def session():
+        for i in remaining:
+            model = f"model-{i % args.models}"
+            start = time.perf_counter()
+            await scheduler.submit(model, f"prompt {i}", {"n": i})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "max_batch_size": max_batch_size,
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "batches": len(backend.batches),
+        "mean_batch_size": round(statistics.mean(backend.batches), 2),
+        **percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-sizes", default="1,4,16,32")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--models", type=int, default=2)
+    parser.add_argument("--batch-ms", type=float, default=20.0)
+    parser.add_argument("--item-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.batch_sizes.split(",")]
+    results = [asyncio.run(run_one(args, size)) for size in sizes]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
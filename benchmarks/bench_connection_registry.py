@@ -0,0 +1,118 @@
+"""
+Connection registry memory and cost benchmark.
+
+Registers `--connections` sessions (default 50k) with ConnectionManager
+in-process, with Redis disconnected so only the node's own bookkeeping is
+measured. The sockets and session ids exist before the first snapshot, so
+the tracemalloc delta is the registry itself: Connection records, the
+session-ordered dict and the by-user index. Also times connect, touch, a
+heartbeat sweep that reaps `--stale-share` of the sessions, and disconnect.
+
+Usage:
+    python -m benchmarks.bench_connection_registry [--connections 50000]
+        [--sessions-per-user 2] [--stale-share 0.01]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+
+import structlog
+
+from app.config import settings
+from app.websocket.manager import ConnectionManager
+
+
+class _Socket:
+    __slots__ = ()
+
+    async def accept(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+async def _connect_all(manager, session_ids, sockets, user_ids):
+    for session_id, websocket, user_id in zip(session_ids, sockets, user_ids):
+        await manager.connect(websocket, session_id, user_id)
+    await manager.stop_heartbeat()
+
+
+async def run(args) -> dict:
+    count = args.connections
+    sockets = [_Socket() for _ in range(count)]
+    session_ids = [f"ws_{i}_{1700000000.0 + i}" for i in range(count)]
+    user_ids = [i // args.sessions_per_user + 1 for i in range(count)]
+
+    # Memory, on a manager that is then thrown away (tracing slows connects)
+    measured = ConnectionManager()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await _connect_all(measured, session_ids, sockets, user_ids)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del measured
+    registry_bytes = sum(
+        stat.size_diff for stat in after.compare_to(before, "filename")
+    )
+
+    manager = ConnectionManager()
+    start = time.perf_counter()
+    await _connect_all(manager, session_ids, sockets, user_ids)
+    connect_seconds = time.perf_counter() - start
+
+    # Everyone but the stale share sends a message; those become the oldest
+    stale = int(count * args.stale_share)
+    for connection in manager.connections.values():
+        connection.last_seen -= settings.WS_HEARTBEAT_TIMEOUT_SECONDS + 1
+    start = time.perf_counter()
+    for session_id in session_ids[stale:]:
+        manager.touch(session_id)
+    touch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await manager.check_heartbeats()
+    sweep_seconds = time.perf_counter() - start
+    reaped = count - len(manager.connections)
+
+    start = time.perf_counter()
+    for session_id in session_ids[stale:]:
+        await manager.disconnect(session_id)
+    disconnect_seconds = time.perf_counter() - start
+
+    return {
+        "connections": count,
+        "users": len(set(user_ids)),
+        "registry_bytes": registry_bytes,
+        "bytes_per_connection": round(registry_bytes / count, 1),
+        "connect_us": round(connect_seconds / count * 1e6, 2),
+        "touch_us": round(touch_seconds / (count - stale) * 1e6, 3),
+        "sweep_ms": round(sweep_seconds * 1000, 2),
+        "reaped": reaped,
+        "disconnect_us": round(disconnect_seconds / (count - stale) * 1e6, 2),
+        "remaining": len(manager.connections) + len(manager.user_sessions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=50_000)
+    parser.add_argument("--sessions-per-user", type=int, default=2)
+    parser.add_argument("--stale-share", type=float, default=0.01)
+    args = parser.parse_args()
+
+    structlog.configure(
+        processors=[structlog.processors.JSONRenderer()],
+        logger_factory=structlog.ReturnLoggerFactory(),
+    )
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Import-time benchmark with a budget.
+
+Imports `app.main` in fresh interpreters under `python -X importtime` and
+checks the result against benchmarks/import_budget.json:
+
+- max_total_ms: ceiling for the fastest run's cumulative import time
+- lazy:         modules that must not be imported eagerly (heavy or rarely
+                used dependencies that are loaded on first use)
+
+Exits 1 when either is exceeded, so it can gate CI.
+
+Usage:
+    python -m benchmarks.bench_import_time [--runs 5] [--top 15] [--budget PATH]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_BUDGET = os.path.join(os.path.dirname(__file__), "import_budget.json")
+
+
+def _parse(stderr: str) -> dict[str, tuple[int, int]]:
+    """Module -> (self us, cumulative us) from `-X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(module: str) -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return _parse(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+    module = budget.get("module", "app.main")
+
+    measure(module)  # populate bytecode caches
+    runs = [measure(module) for _ in range(args.runs)]
+    totals_ms = [run[module][1] / 1000 for run in runs]
+    fastest = runs[totals_ms.index(min(totals_ms))]
+
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    heaviest = sorted(fastest.items(), key=lambda item: item[1][0], reverse=True)
+    for name, (self_us, cumulative_us) in heaviest[: args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+    total_ms = min(totals_ms)
+    eager = sorted(name for name in budget.get("lazy", []) if name in fastest)
+    summary = {
+        "module": module,
+        "total_ms_min": round(total_ms, 1),
+        "total_ms_median": round(statistics.median(totals_ms), 1),
+        "max_total_ms": budget["max_total_ms"],
+        "eager_lazy_modules": eager,
+    }
+    print(json.dumps(summary))
+
+    failed = False
+    if total_ms > budget["max_total_ms"]:
+        print(f"FAIL: {module} imports in {total_ms:.1f} ms, budget {budget['max_total_ms']} ms")
+        failed = True
+    for name in eager:
+        print(f"FAIL: {name} is imported eagerly but is budgeted as lazy")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
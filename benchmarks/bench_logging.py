@@ -0,0 +1,103 @@
+"""
+Per-log-call overhead benchmark.
+
+Measures the time a caller spends in `logger.info("http_request", ...)` for:
+
+- print:   the previous PrintLoggerFactory + json JSONRenderer pipeline
+- queue:   QueueLogSink + orjson renderer (writer thread does the I/O)
+- sampled: queue pipeline with http_request sampled at 1%
+
+Output goes to a file (default /dev/null) so terminal speed does not
+dominate; point --target at a pipe or file to include real I/O cost.
+
+Usage:
+    python -m benchmarks.bench_logging [--calls 100000] [--target /dev/null]
+"""
+
+import argparse
+import json
+import logging
+import time
+
+import structlog
+
+from app.core.logging import EventSampler, QueueLoggerFactory, QueueLogSink
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _processors(renderer, sample_rates=None):
+    processors = [
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        structlog.processors.StackInfoRenderer(),
+        structlog.dev.set_exc_info,
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+        renderer,
+    ]
+    if sample_rates:
+        processors.insert(0, EventSampler(sample_rates))
+    return processors
+
+
+def _measure(calls: int) -> float:
+    """Return microseconds per call."""
+    log = structlog.get_logger()
+    start = time.perf_counter()
+    for i in range(calls):
+        log.info(
+            "http_request",
+            method="GET",
+            path="/api/v1/health/",
+            status_code=200,
+            duration="0.001s",
+        )
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--target", default="/dev/null")
+    args = parser.parse_args()
+
+    fast_json = (
+        structlog.processors.JSONRenderer(serializer=orjson.dumps)
+        if orjson
+        else structlog.processors.JSONRenderer()
+    )
+    wrapper = structlog.make_filtering_bound_logger(logging.INFO)
+    results = {}
+
+    with open(args.target, "w") as out:
+        structlog.configure(
+            processors=_processors(structlog.processors.JSONRenderer()),
+            wrapper_class=wrapper,
+            logger_factory=structlog.PrintLoggerFactory(out),
+            cache_logger_on_first_use=True,
+        )
+        results["print"] = _measure(args.calls)
+
+        for name, rates in (("queue", None), ("sampled", {"http_request": 0.01})):
+            # Large queue so the measurement is enqueue cost, not drops
+            sink = QueueLogSink(out, maxsize=args.calls + 1, batch_size=512)
+            sink.start()
+            structlog.configure(
+                processors=_processors(fast_json, rates),
+                wrapper_class=wrapper,
+                logger_factory=QueueLoggerFactory(sink),
+                cache_logger_on_first_use=True,
+            )
+            results[name] = _measure(args.calls)
+            sink.stop(timeout=30)
+
+    for name, usec in results.items():
+        print(f"{name:>8}: {usec:6.2f} us/call")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+HTTP middleware overhead benchmark.
+
+Compares the previous pair of `@app.middleware("http")` layers against the
+single pure-ASGI ObservabilityMiddleware on a trivial endpoint. Requests are
+driven straight through the ASGI interface (no sockets), so the numbers
+isolate middleware cost.
+
+Usage:
+    python -m benchmarks.bench_middleware [--requests 20000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import structlog
+from fastapi import FastAPI, Request
+
+from app.core.monitoring import http_request_duration_seconds, http_requests_total
+from app.middleware.observability import ObservabilityMiddleware
+
+logger = structlog.get_logger()
+
+
+def _base_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def legacy_app() -> FastAPI:
+    """The two BaseHTTPMiddleware-style layers as they were in app.main."""
+    app = _base_app()
+
+    @app.middleware("http")
+    async def add_security_headers(request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = (
+            "max-age=31536000; includeSubDomains"
+        )
+        return response
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        duration = time.time() - start_time
+        logger.info(
+            "http_request",
+            method=request.method,
+            path=request.url.path,
+            status_code=response.status_code,
+            duration=f"{duration:.3f}s",
+        )
+        http_requests_total.labels(
+            method=request.method, endpoint=request.url.path, status=response.status_code
+        ).inc()
+        http_request_duration_seconds.labels(
+            method=request.method, endpoint=request.url.path
+        ).observe(duration)
+        return response
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = _base_app()
+    app.add_middleware(ObservabilityMiddleware)
+    return app
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/ping",
+    "raw_path": b"/ping",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [(b"host", b"bench")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("bench", 80),
+}
+
+
+async def _request(app):
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            # Like a server: nothing more arrives until the client goes away
+            await asyncio.Event().wait()
+        body_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(SCOPE), receive, send)
+
+
+async def run(app, requests: int, concurrency: int) -> float:
+    """Return requests per second."""
+    for _ in range(200):  # warm-up
+        await _request(app)
+
+    start = time.perf_counter()
+    for _ in range(requests // concurrency):
+        await asyncio.gather(*(_request(app) for _ in range(concurrency)))
+    return (requests // concurrency) * concurrency / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    # Identical, output-free logging for both variants
+    structlog.configure(
+        processors=[structlog.processors.JSONRenderer()],
+        logger_factory=structlog.ReturnLoggerFactory(),
+    )
+
+    results = {}
+    for name, factory in (("legacy", legacy_app), ("asgi", asgi_app)):
+        results[name] = asyncio.run(run(factory(), args.requests, args.concurrency))
+        print(f"{name:>8}: {results[name]:,.0f} req/s")
+
+    results["speedup"] = results["asgi"] / results["legacy"]
+    print(f" speedup: {results['speedup']:.2f}x")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
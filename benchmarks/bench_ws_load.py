@@ -0,0 +1,263 @@
+"""
+WebSocket load benchmark.
+
+Starts the app on the stand-in stack (benchmarks._stack: in-memory Redis,
+SQLite) in a separate process, opens many authenticated /api/v1/ws
+connections and drives a weighted mix of message types from each, one
+request at a time. Reports:
+
+- connect rate and failures
+- throughput and p50/p99/p999 latency per message type (request sent to
+  the final reply: pong, heartbeat_ack, context.ack, or the idle status
+  that ends a chat exchange)
+- server RSS growth per open connection
+- heartbeat sweep cost, from ws_heartbeat_sweep_duration_seconds
+- error replies per message type (e.g. inbound limit rejections)
+
+The server's per-connection inbound limits are lifted by default, since
+each connection sends far faster than a real client; pass --keep-limits
+to measure with the configured limits instead.
+
+Usage:
+    python -m benchmarks.bench_ws_load [--connections 1000] [--duration 30]
+        [--mix ping=4,heartbeat=2,chat.message=1,context.update=1]
+        [--sweep-interval 5] [--keep-limits] [--url ws://host:port]
+        [--output results.json]
+
+With --url the tool drives an already running server instead; memory per
+connection is then not reported.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+from websockets.asyncio.client import connect
+
+from benchmarks._stack import (
+    free_port,
+    metric_value,
+    percentiles,
+    raise_fd_limit,
+    rss_kb,
+    start_server,
+    stop_server,
+)
+
+MESSAGES = {
+    "ping": lambda i: {"type": "ping"},
+    "heartbeat": lambda i: {"type": "heartbeat"},
+    "context.update": lambda i: {
+        "type": "context.update",
+        "context": {"file": f"src/module_{i % 50}.py", "line": i % 400},
+    },
+    "chat.message": lambda i: {
+        "type": "chat.message",
+        "request_id": f"bench-{i}",
+        "payload": {"content": "Explain this function", "context": {"lang": "py"}},
+    },
+}
+
+
+# Server settings that lift the inbound limits unless --keep-limits is given
+UNLIMITED = {
+    "WS_MESSAGE_RATE_DEFAULT": "1000000",
+    "WS_MESSAGE_RATES": "{}",
+    "WS_MAX_INFLIGHT_PER_CONNECTION": "1000",
+}
+
+
+def _is_final(message_type: str, reply: dict) -> bool:
+    if reply.get("type") == "error":
+        return True  # A rejected request gets no other reply
+    if message_type == "chat.message":
+        return reply.get("type") == "status" and reply.get("status") == "idle"
+    return reply.get("type") == {
+        "ping": "pong",
+        "heartbeat": "heartbeat_ack",
+        "context.update": "context.ack",
+    }[message_type]
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in MESSAGES:
+            raise SystemExit(f"unknown message type in --mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def _open(url: str, user_id: int, limiter: asyncio.Semaphore, stats: dict):
+    from app.core.security import create_access_token
+
+    token = create_access_token({"sub": str(user_id)})
+    async with limiter:
+        start = time.perf_counter()
+        try:
+            ws = await connect(f"{url}/api/v1/ws?token={token}", max_queue=None)
+            await ws.recv()  # connected status
+        except Exception as e:
+            stats["connect_errors"][type(e).__name__] += 1
+            return None
+        stats["connect_latency"].append(time.perf_counter() - start)
+        return ws
+
+
+async def _drive(ws, mix: dict[str, float], deadline: float, stats: dict):
+    names, weights = list(mix), list(mix.values())
+    counter = 0
+    while time.monotonic() < deadline:
+        message_type = random.choices(names, weights)[0]
+        counter += 1
+        start = time.perf_counter()
+        try:
+            await ws.send(json.dumps(MESSAGES[message_type](counter)))
+            while True:
+                reply = json.loads(await ws.recv())
+                if _is_final(message_type, reply):
+                    break
+        except Exception as e:
+            stats["message_errors"][type(e).__name__] += 1
+            return
+        if reply.get("type") == "error":
+            stats["rejected"][message_type][reply.get("code", "error")] += 1
+        else:
+            stats["latency"][message_type].append(time.perf_counter() - start)
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    server = None
+    if args.url:
+        url, port = args.url.rstrip("/"), int(args.url.rsplit(":", 1)[1])
+    else:
+        port = free_port()
+        env = {"WS_HEARTBEAT_INTERVAL_SECONDS": str(args.sweep_interval)}
+        if not args.keep_limits:
+            env.update(UNLIMITED)
+        server = start_server(
+            port,
+            env=env,
+            redis_latency_ms=args.redis_latency_ms,
+        )
+        url = f"ws://127.0.0.1:{port}"
+
+    stats = {
+        "connect_latency": [],
+        "connect_errors": defaultdict(int),
+        "message_errors": defaultdict(int),
+        "latency": defaultdict(list),
+        "rejected": defaultdict(lambda: defaultdict(int)),
+    }
+    try:
+        rss_before = rss_kb(server.pid) if server else None
+        limiter = asyncio.Semaphore(args.connect_concurrency)
+        start = time.perf_counter()
+        sockets = await asyncio.gather(
+            *(_open(url, i + 1, limiter, stats) for i in range(args.connections))
+        )
+        connect_seconds = time.perf_counter() - start
+        sockets = [ws for ws in sockets if ws is not None]
+        await asyncio.sleep(1)  # let the server settle before measuring memory
+        rss_after = rss_kb(server.pid) if server else None
+
+        start = time.perf_counter()
+        deadline = time.monotonic() + args.duration
+        await asyncio.gather(*(_drive(ws, mix, deadline, stats) for ws in sockets))
+        load_seconds = time.perf_counter() - start
+
+        # Make sure at least one sweep ran over the full set of connections
+        await asyncio.sleep(max(0.0, args.sweep_interval - args.duration) + 0.5)
+        sweeps = metric_value(port, "ws_heartbeat_sweep_duration_seconds_count")
+        sweep_total = metric_value(port, "ws_heartbeat_sweep_duration_seconds_sum")
+
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+    finally:
+        if server:
+            stop_server(server)
+
+    total_messages = sum(len(v) for v in stats["latency"].values())
+    open_count = len(sockets)
+    return {
+        "config": {
+            "connections": args.connections,
+            "duration": args.duration,
+            "mix": mix,
+            "keep_limits": args.keep_limits,
+            "redis_latency_ms": args.redis_latency_ms,
+            "sweep_interval": args.sweep_interval,
+        },
+        "connect": {
+            "opened": open_count,
+            "errors": dict(stats["connect_errors"]),
+            "seconds": round(connect_seconds, 3),
+            "per_second": round(open_count / connect_seconds, 1),
+            **percentiles(stats["connect_latency"]),
+        },
+        "messages": {
+            "total": total_messages,
+            "per_second": round(total_messages / load_seconds, 1),
+            "errors": dict(stats["message_errors"]),
+            "rejected": {
+                name: dict(reasons) for name, reasons in sorted(stats["rejected"].items())
+            },
+            "by_type": {
+                name: {"count": len(values), **percentiles(values)}
+                for name, values in sorted(stats["latency"].items())
+            },
+        },
+        "server_memory": {
+            "rss_before_kb": rss_before,
+            "rss_after_kb": rss_after,
+            "per_connection_kb": (
+                round((rss_after - rss_before) / open_count, 2)
+                if server and open_count
+                else None
+            ),
+        },
+        "heartbeat_sweep": {
+            "sweeps": int(sweeps),
+            "avg_ms": round(sweep_total / sweeps * 1000, 3) if sweeps else None,
+            "per_connection_us": (
+                round(sweep_total / sweeps / open_count * 1e6, 3)
+                if sweeps and open_count
+                else None
+            ),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--mix", default="ping=4,heartbeat=2,chat.message=1,context.update=1"
+    )
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--sweep-interval", type=float, default=5.0)
+    parser.add_argument("--redis-latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--keep-limits",
+        action="store_true",
+        help="Keep the server's inbound rate and in-flight limits",
+    )
+    parser.add_argument("--url", help="Drive an existing server, e.g. ws://127.0.0.1:8000")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,11 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
+from app.config import settings
 from app.core.database import Base, get_db
+from app.core.security import get_password_hash, verify_password
+from app.models.user import User
+from app.services import provisioning
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -60,3 +64,106 @@ def test_login_user():
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
+
+
+def test_logout_revokes_token():
+    """A token is rejected by HTTP auth once it has been logged out."""
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": "logout@example.com", "password": "testpass123"},
+    )
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"email": "logout@example.com", "password": "testpass123"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+    assert client.post("/api/v1/auth/logout", headers=headers).status_code == 204
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+
+
+def _superuser_headers(email: str) -> dict[str, str]:
+    db = TestingSessionLocal()
+    db.add(
+        User(
+            email=email,
+            hashed_password=get_password_hash("adminpass123"),
+            is_superuser=True,
+        )
+    )
+    db.commit()
+    db.close()
+    token = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "adminpass123"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_bulk_register_reports_per_row_status():
+    """Bulk registration creates new users and flags bad or duplicate rows."""
+    headers = _superuser_headers("bulk-admin@example.com")
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": "bulk-existing@example.com", "password": "testpass123"},
+    )
+
+    response = client.post(
+        "/api/v1/auth/register/bulk",
+        headers=headers,
+        json={
+            "users": [
+                {"email": "bulk-1@example.com", "password": "testpass123"},
+                {"email": "bulk-existing@example.com", "password": "testpass123"},
+                {"email": "not-an-email", "password": "testpass123"},
+                {"email": "bulk-2@example.com", "password": "testpass123"},
+                {"email": "bulk-1@example.com", "password": "otherpass123"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == [
+        "created",
+        "duplicate",
+        "invalid",
+        "created",
+        "duplicate",
+    ]
+    assert (data["created"], data["duplicates"], data["invalid"]) == (2, 2, 1)
+
+    login = client.post(
+        "/api/v1/auth/login",
+        json={"email": "bulk-2@example.com", "password": "testpass123"},
+    )
+    assert login.status_code == 200
+
+
+def test_bulk_register_requires_superuser():
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": "bulk-user@example.com", "password": "testpass123"},
+    )
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"email": "bulk-user@example.com", "password": "testpass123"},
+    ).json()["access_token"]
+
+    response = client.post(
+        "/api/v1/auth/register/bulk",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"users": [{"email": "x@example.com", "password": "testpass123"}]},
+    )
+    assert response.status_code == 403
+
+
+def test_hash_passwords_uses_process_pool(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_HASH_WORKERS", 2)
+    monkeypatch.setattr(settings, "BULK_HASH_PARALLEL_THRESHOLD", 2)
+    try:
+        hashes = provisioning.hash_passwords(["password-a", "password-b"])
+    finally:
+        provisioning.shutdown_hash_pool()
+
+    assert verify_password("password-a", hashes[0])
+    assert verify_password("password-b", hashes[1])
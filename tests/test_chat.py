@@ -0,0 +1,246 @@
+"""
+Chat request dedup, response cache, batching and fair scheduling tests.
+"""
+
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+from pydantic import ValidationError
+
+from app.chat.backends import FakeBackend, Prompt, echo_reply
+from app.chat.batching import BatchScheduler
+from app.chat.dedup import RequestDeduplicator
+from app.chat.fairness import ChatBusy, FairScheduler
+from app.chat.response_cache import ResponseCache, prompt_key
+from app.chat.service import complete
+from app.config import Settings, settings
+
+
+@pytest.mark.asyncio
+async def test_retries_attach_to_running_request_then_replay():
+    dedup = RequestDeduplicator(ttl=60, maxsize=10)
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return f"answer-{calls}"
+
+    first = asyncio.create_task(dedup.run((1, "r1"), compute))
+    retry = asyncio.create_task(dedup.run((1, "r1"), compute))
+    other_user = asyncio.create_task(dedup.run((2, "r1"), compute))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first == ("answer-1", "computed")
+    assert await retry == ("answer-1", "attached")
+    assert (await other_user)[1] == "computed"
+    assert await dedup.run((1, "r1"), compute) == ("answer-1", "replayed")
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_work_survives_the_caller_and_failures_are_not_stored():
+    dedup = RequestDeduplicator(ttl=60, maxsize=10)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    caller = asyncio.create_task(dedup.run("k", slow))
+    await asyncio.sleep(0)
+    caller.cancel()  # e.g. the client's connection closed
+    await asyncio.sleep(0.1)
+    assert await dedup.run("k", slow) == ("done", "replayed")
+
+    async def boom():
+        raise RuntimeError("backend down")
+
+    with pytest.raises(RuntimeError):
+        await dedup.run("f", boom)
+    assert await dedup.run("f", slow) == ("done", "computed")
+
+
+def test_response_cache_is_opt_in_and_keyed_by_prompt():
+    key = prompt_key("m", "hello", {"b": 1, "a": 2})
+    assert key == prompt_key("m", "hello", {"a": 2, "b": 1})
+    assert key != prompt_key("other", "hello", {"a": 2, "b": 1})
+
+    disabled = ResponseCache(ttl=60, maxsize=10, enabled=False)
+    disabled.set(key, "reply")
+    assert disabled.get(key) is None
+
+    cache = ResponseCache(ttl=60, maxsize=10, enabled=True)
+    hits_before = REGISTRY.get_sample_value(
+        "chat_response_cache_lookups_total", {"result": "hit"}
+    ) or 0
+    assert cache.get(key) is None
+    cache.set(key, "reply")
+    assert cache.get(key) == "reply"
+    assert REGISTRY.get_sample_value(
+        "chat_response_cache_lookups_total", {"result": "hit"}
+    ) == hits_before + 1
+
+
+def test_response_cache_entries_gauge_drops_expired_entries():
+    def entries():
+        return REGISTRY.get_sample_value("chat_response_cache_entries")
+
+    cache = ResponseCache(ttl=0.05, maxsize=10, enabled=True)
+    cache.set("a", "reply")
+    cache.set("b", "reply")
+    assert entries() == 2
+
+    time.sleep(0.06)
+    assert cache.get("a") is None  # expired on lookup
+    assert entries() == 1
+    cache.set("c", "reply")  # "b" expired without a lookup
+    assert entries() == 1
+
+
+@pytest.mark.asyncio
+async def test_complete_replays_by_user_and_request_id():
+    def replayed():
+        return REGISTRY.get_sample_value(
+            "chat_requests_total", {"outcome": "replayed"}
+        ) or 0
+
+    before = replayed()
+    first = await complete(7, "req-1", "m", "hi", {})
+    assert await complete(7, "req-1", "m", "changed", {}) == first
+    assert replayed() == before + 1
+
+
+@pytest.mark.asyncio
+async def test_batches_per_model_by_size_and_wait():
+    backend = FakeBackend(batch_seconds=0.01, item_seconds=0)
+    scheduler = BatchScheduler(
+        backend, max_batch_size=4, max_wait=0.02, max_concurrency=2
+    )
+
+    requests = [("a", f"q{i}") for i in range(5)] + [("b", "q5"), ("b", "q6")]
+    replies = await asyncio.gather(
+        *(scheduler.submit(model, content, {}) for model, content in requests)
+    )
+
+    assert replies == [echo_reply(Prompt(content, {})) for _, content in requests]
+    assert sorted(backend.batches) == [1, 2, 4]
+
+
+@pytest.mark.asyncio
+async def test_backend_failure_reaches_every_request_in_the_batch():
+    class Broken:
+        async def generate_batch(self, model, prompts):
+            raise RuntimeError("model server down")
+
+    scheduler = BatchScheduler(
+        Broken(), max_batch_size=2, max_wait=0.01, max_concurrency=1
+    )
+    results = await asyncio.gather(
+        scheduler.submit("m", "x", {}),
+        scheduler.submit("m", "y", {}),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_batches_keep_filling_while_the_backend_is_busy():
+    backend = FakeBackend(batch_seconds=0.05, item_seconds=0)
+    scheduler = BatchScheduler(
+        backend, max_batch_size=8, max_wait=0.001, max_concurrency=1
+    )
+
+    first = asyncio.create_task(scheduler.submit("m", "first", {}))
+    await asyncio.sleep(0.01)  # first batch is now at the backend
+    rest = [scheduler.submit("m", f"q{i}", {}) for i in range(10)]
+    await asyncio.gather(first, *rest)
+
+    assert list(backend.batches) == [1, 8, 2]
+
+
+async def _serve_in_order(scheduler, requests):
+    """Queue requests behind one running request; return the order they ran in."""
+    order = []
+    gate = asyncio.Event()
+
+    async def work(name):
+        order.append(name)
+        await gate.wait()
+
+    first = asyncio.create_task(scheduler.run(0, lambda: work("first")))
+    await asyncio.sleep(0)
+    tasks = []
+    for user_id, name in requests:
+        tasks.append(
+            asyncio.create_task(scheduler.run(user_id, lambda n=name: work(n)))
+        )
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    return order[1:]
+
+
+@pytest.mark.asyncio
+async def test_round_robin_across_users():
+    scheduler = FairScheduler(
+        max_concurrency=1, max_queued_per_user=8, max_queued=64, weighted=False
+    )
+    requests = [(1, "a1"), (1, "a2"), (1, "a3"), (2, "b1"), (2, "b2")]
+
+    order = await _serve_in_order(scheduler, requests)
+
+    assert order == ["a1", "b1", "a2", "b2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_weighted_fair_queuing_by_user_class(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_USER_CLASSES", {2: "priority"})
+    monkeypatch.setattr(
+        settings, "CHAT_CLASS_WEIGHTS", {"default": 1, "priority": 2}
+    )
+    scheduler = FairScheduler(
+        max_concurrency=1, max_queued_per_user=8, max_queued=64, weighted=True
+    )
+    requests = [(1, "a1"), (1, "a2"), (2, "b1"), (2, "b2"), (2, "b3"), (2, "b4")]
+
+    order = await _serve_in_order(scheduler, requests)
+
+    assert order == ["b1", "a1", "b2", "b3", "a2", "b4"]
+    assert REGISTRY.get_sample_value(
+        "chat_queue_wait_seconds_count", {"user_class": "priority"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_fast_and_cancelled_waiters_free_their_place():
+    scheduler = FairScheduler(
+        max_concurrency=1, max_queued_per_user=1, max_queued=64, weighted=False
+    )
+    gate = asyncio.Event()
+    running = asyncio.create_task(scheduler.run(1, gate.wait))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(scheduler.run(1, gate.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ChatBusy) as busy:
+        await scheduler.run(1, gate.wait)
+    assert busy.value.retry_after > 0
+
+    queued.cancel()
+    await asyncio.sleep(0)
+    retry = asyncio.create_task(scheduler.run(1, gate.wait))  # place is free again
+    gate.set()
+    await asyncio.gather(running, retry)
+    assert scheduler.running == 0 and not scheduler._queued
+
+
+@pytest.mark.parametrize("weight", [0, -1, float("nan")])
+def test_class_weights_must_be_positive(weight):
+    with pytest.raises(ValidationError, match="priority"):
+        Settings(CHAT_CLASS_WEIGHTS={"default": 1, "priority": weight})
@@ -0,0 +1,108 @@
+"""
+Health and readiness endpoint tests.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.core.probes import ProbeResult, ReadinessChecker
+from app.core.warmup import Warmup, warmup
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def probe_calls(monkeypatch):
+    calls = []
+
+    async def database(timeout):
+        calls.append("database")
+        await asyncio.sleep(0.01)
+        return ProbeResult(True, 0.01)
+
+    async def redis(timeout):
+        calls.append("cache")
+        return ProbeResult(False, timeout, "timeout")
+
+    monkeypatch.setattr("app.core.probes.probe_database", database)
+    monkeypatch.setattr("app.core.probes.probe_redis", redis)
+    return calls
+
+
+def test_health_check():
+    response = client.get("/api/v1/health/")
+    assert response.json()["status"] == "healthy"
+
+
+def test_readiness_reports_each_dependency():
+    body = client.get("/api/v1/health/readiness").json()
+
+    assert body["status"] in ("ready", "not_ready")
+    assert set(body["checks"]["latency_seconds"]) == {"database", "cache"}
+
+
+@pytest.mark.asyncio
+async def test_readiness_result(probe_calls):
+    result = await ReadinessChecker(ttl=10, timeout=0.5).check()
+
+    assert result["status"] == "not_ready"
+    assert result["checks"]["database"] is True
+    assert result["checks"]["cache"] is False
+    assert result["checks"]["cache_error"] == "timeout"
+    assert result["checks"]["latency_seconds"] == {"database": 0.01, "cache": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_probes_share_one_check(probe_calls):
+    checker = ReadinessChecker(ttl=10, timeout=0.5)
+
+    results = await asyncio.gather(*(checker.check() for _ in range(5)))
+    await checker.check()
+
+    assert probe_calls == ["database", "cache"]
+    assert all(result is results[0] for result in results)
+
+
+@pytest.mark.asyncio
+async def test_expired_result_is_rechecked(probe_calls):
+    checker = ReadinessChecker(ttl=0, timeout=0.5)
+
+    await checker.check()
+    await checker.check()
+
+    assert probe_calls == ["database", "cache"] * 2
+
+
+def test_readiness_gated_by_warmup(monkeypatch):
+    monkeypatch.setattr(warmup, "pending", True)
+
+    body = client.get("/api/v1/health/readiness").json()
+
+    assert body["status"] == "not_ready"
+    assert body["checks"]["warmup"] is False
+
+
+@pytest.mark.asyncio
+async def test_warmup_runs_every_step_despite_failures():
+    ran = []
+
+    async def failing():
+        ran.append("failing")
+        raise RuntimeError("boom")
+
+    async def ok():
+        ran.append("ok")
+        assert steps.pending
+
+    steps = Warmup({"failing": failing, "ok": ok})
+    steps.start()
+    assert steps.pending
+    await steps._task
+
+    assert ran == ["failing", "ok"]
+    assert not steps.pending
+    assert REGISTRY.get_sample_value("warmup_step_duration_seconds", {"step": "ok"}) >= 0
@@ -0,0 +1,66 @@
+"""
+Logging pipeline tests: sampling and the queued writer.
+"""
+
+import io
+
+import pytest
+import structlog
+from prometheus_client import REGISTRY
+
+from app.core.logging import EventSampler, QueueLogSink
+
+
+def _dropped(reason: str) -> float:
+    return REGISTRY.get_sample_value(
+        "log_records_dropped_total", {"reason": reason}
+    ) or 0
+
+
+def test_sampler_drops_sampled_events_but_keeps_errors():
+    sampler = EventSampler({"http_request": 0.0, "chat": 1.0})
+
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "http_request"})
+
+    assert sampler(None, "error", {"event": "http_request"})
+    assert sampler(None, "info", {"event": "chat"})
+    assert sampler(None, "info", {"event": "unlisted"})
+
+
+def test_sampler_tags_kept_events_with_rate(monkeypatch):
+    monkeypatch.setattr("app.core.logging.random.random", lambda: 0.001)
+    sampler = EventSampler({"http_request": 0.01})
+
+    assert sampler(None, "info", {"event": "http_request"})["sample_rate"] == 0.01
+
+
+def test_sink_drops_and_counts_when_full():
+    sink = QueueLogSink(io.StringIO(), maxsize=1, batch_size=10)
+    before = _dropped("queue_full")
+
+    sink.put("first")
+    sink.put("second")  # writer not started: queue is full
+
+    assert _dropped("queue_full") == before + 1
+
+
+def test_sink_writes_batches():
+    stream = io.BytesIO()
+    stream.buffer = stream  # behave like sys.stdout
+    sink = QueueLogSink(stream, maxsize=100, batch_size=10)
+
+    for i in range(5):
+        sink.put(f"line-{i}")
+    sink.put(b'{"already": "bytes"}')
+    sink.start()
+    sink.stop()
+
+    assert stream.getvalue().decode().splitlines() == [
+        "line-0",
+        "line-1",
+        "line-2",
+        "line-3",
+        "line-4",
+        '{"already": "bytes"}',
+    ]
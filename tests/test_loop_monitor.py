@@ -0,0 +1,47 @@
+"""
+Event loop watchdog tests.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.loop_monitor import BACKGROUND_ROUTE, LoopWatchdog
+
+
+def _blocked(route: str) -> float:
+    return REGISTRY.get_sample_value("event_loop_blocked_total", {"route": route}) or 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_counted_by_route():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05)
+    watchdog.start()
+    before = _blocked("/blocking")
+
+    async def handler():
+        watchdog.track({"type": "http", "route": SimpleNamespace(path="/blocking")})
+        time.sleep(0.2)
+
+    await asyncio.create_task(handler())
+    await asyncio.sleep(0.05)
+    await watchdog.stop()
+
+    assert _blocked("/blocking") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_lag_recorded_without_false_positives():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.5)
+    lag_before = REGISTRY.get_sample_value("event_loop_lag_seconds_count") or 0
+    blocked_before = _blocked(BACKGROUND_ROUTE)
+
+    watchdog.start()
+    await asyncio.sleep(0.1)
+    await watchdog.stop()
+
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds_count") > lag_before
+    assert _blocked(BACKGROUND_ROUTE) == blocked_before
@@ -0,0 +1,80 @@
+"""
+ObservabilityMiddleware tests.
+"""
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry, Counter
+
+from app.main import app
+from app.core.monitoring import OVERFLOW_LABEL, UNMATCHED_ROUTE, LabelLimiter
+from app.middleware.observability import ObservabilityMiddleware
+
+client = TestClient(app)
+
+
+def test_security_headers_added():
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert "max-age=31536000" in response.headers["strict-transport-security"]
+
+
+def test_request_metrics_recorded():
+    labels = {"method": "GET", "endpoint": "/", "status": "200"}
+    before = REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+    client.get("/")
+
+    assert REGISTRY.get_sample_value("http_requests_total", labels) == before + 1
+
+
+def test_metrics_use_route_templates():
+    """Unknown paths fold into one label instead of one series per path."""
+    client.get("/scanner/probe-1")
+    client.get("/scanner/probe-2")
+
+    labels = {"method": "GET", "endpoint": UNMATCHED_ROUTE, "status": "404"}
+    assert REGISTRY.get_sample_value("http_requests_total", labels) >= 2
+    assert not any(
+        sample.labels.get("endpoint", "").startswith("/scanner")
+        for metric in REGISTRY.collect()
+        for sample in metric.samples
+    )
+
+
+def test_label_limiter_caps_series():
+    counter = Counter(
+        "capped_total", "test", ["endpoint"], registry=CollectorRegistry()
+    )
+    limited = LabelLimiter(counter, overflow_label="endpoint", max_series=2)
+
+    for path in ("/a", "/b", "/c", "/d", "/a"):
+        limited.labels(endpoint=path).inc()
+
+    values = {
+        s.labels["endpoint"]: s.value
+        for s in counter.collect()[0].samples
+        if s.name == "capped_total"
+    }
+    assert values == {"/a": 2, "/b": 1, OVERFLOW_LABEL: 2}
+
+
+def test_streaming_body_passes_through():
+    stream_app = FastAPI()
+    stream_app.add_middleware(ObservabilityMiddleware)
+
+    @stream_app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i};"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    response = TestClient(stream_app).get("/stream")
+
+    assert response.text == "chunk-0;chunk-1;chunk-2;"
+    assert response.headers["x-frame-options"] == "DENY"
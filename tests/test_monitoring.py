@@ -0,0 +1,123 @@
+"""
+Metrics endpoint and dependency prober tests.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+from app.main import app
+from app.config import settings
+from app.core import monitoring
+from app.core import probes
+from app.core.probes import DependencyProber, ProbeResult, probe_database, probe_redis
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "mdz_redis_up" in response.text
+    assert "mdz_db_up" in response.text
+
+
+def test_metrics_output_is_cached(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_CACHE_TTL_SECONDS", 60.0)
+    monkeypatch.setattr(monitoring, "_metrics_cache", None)
+
+    first = monitoring.get_metrics()
+    monitoring.auth_attempts_total.labels(status="cache_probe").inc()
+
+    assert monitoring.get_metrics() is first
+
+
+@pytest.mark.asyncio
+async def test_prober_marks_disconnected_redis_down(monkeypatch):
+    async def database_up(timeout):
+        return ProbeResult(True, 0.001)
+
+    monkeypatch.setattr("app.core.probes.probe_database", database_up)
+
+    assert not (await probe_redis(timeout=0.1)).ok
+
+    await DependencyProber().run_once()
+
+    assert REGISTRY.get_sample_value("mdz_redis_up") == 0
+    assert REGISTRY.get_sample_value("mdz_db_up") == 1
+
+
+@pytest.mark.asyncio
+async def test_hung_database_ping_is_not_restarted_by_later_probes(monkeypatch):
+    release = threading.Event()
+    calls = 0
+
+    def hung_ping(timeout):
+        nonlocal calls
+        calls += 1
+        release.wait(5)
+
+    monkeypatch.setattr(probes, "_ping_database", hung_ping)
+    monkeypatch.setattr(probes, "_db_ping", None)
+
+    for _ in range(3):
+        assert (await probe_database(timeout=0.02)).error == "timeout"
+    assert calls == 1
+
+    release.set()
+    assert (await probe_database(timeout=1)).ok
+    assert (await probe_database(timeout=1)).ok
+    assert calls == 2
+
+
+WORKER_SCRIPT = """
+import sys
+from app.core.monitoring import db_connections, http_requests_total
+
+http_requests_total.labels(method="GET", endpoint="/", status="200").inc()
+db_connections.inc()
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def test_multiprocess_metrics_aggregate_across_workers(tmp_path):
+    """Counters sum across workers; live gauges forget dead workers."""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER_SCRIPT],
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(3)
+    ]
+    for worker in workers:
+        assert worker.stdout.readline().strip() == "ready"
+
+    def sample(name, labels=None):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+        return registry.get_sample_value(name, labels or {})
+
+    http_labels = {"method": "GET", "endpoint": "/", "status": "200"}
+    try:
+        assert sample("http_requests_total", http_labels) == 3
+        assert sample("db_connections_active") == 3
+
+        workers[0].communicate("")
+        assert monitoring.cleanup_dead_workers(str(tmp_path)) == 1
+
+        assert sample("http_requests_total", http_labels) == 3
+        assert sample("db_connections_active") == 2
+        assert (tmp_path / "counter_archive.db").exists()
+    finally:
+        for worker in workers[1:]:
+            worker.communicate("")
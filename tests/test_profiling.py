@@ -0,0 +1,128 @@
+"""
+Sampling profiler and debug profiling endpoint tests.
+"""
+
+import importlib
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core import profiling
+from app.core.profiling import SamplingProfiler
+from app.middleware import observability
+from app.core.security import create_access_token
+from app.dependencies import get_current_superuser
+from app.models.user import User
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def as_admin(monkeypatch):
+    app.dependency_overrides[get_current_superuser] = lambda: User(
+        id=1, email="admin@example.com", is_superuser=True
+    )
+    # The X-Profile and WebSocket triggers look the user up themselves
+    superuser = lambda user_id: user_id == 1  # noqa: E731
+    # (app.websocket re-exports the router instance under the module's name)
+    ws_router = importlib.import_module("app.websocket.router")
+    monkeypatch.setattr(observability, "is_active_superuser", superuser)
+    monkeypatch.setattr(ws_router, "is_active_superuser", superuser)
+    yield
+    del app.dependency_overrides[get_current_superuser]
+
+
+def _bearer(user_id: int) -> dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def _busy_wait(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collapses_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_wait, args=(stop,), name="busy")
+    worker.start()
+
+    profiler = SamplingProfiler(interval=0.001, thread_ids={worker.ident})
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    lines = profiler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.startswith("busy;")
+    assert "_busy_wait (test_profiling.py:" in stack
+    assert int(count) > 0
+
+
+def test_process_profile_requires_admin():
+    assert client.get("/debug/profile?seconds=0.1").status_code == 401
+
+
+def test_process_profile(as_admin):
+    response = client.get("/debug/profile?seconds=0.2&interval_ms=2")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+def test_single_request_profile(as_admin):
+    response = client.get("/", headers={"X-Profile": "1", **_bearer(1)})
+    profile_id = response.headers["x-profile-id"]
+
+    assert client.get(f"/debug/profiles/{profile_id}").status_code == 200
+    assert client.get("/debug/profiles/missing").status_code == 404
+    assert "x-profile-id" not in client.get("/").headers
+
+
+def test_single_request_profile_requires_superuser(as_admin):
+    assert "x-profile-id" not in client.get("/", headers={"X-Profile": "1"}).headers
+    response = client.get("/", headers={"X-Profile": "1", **_bearer(2)})
+    assert "x-profile-id" not in response.headers
+
+
+def test_single_request_profile_waits_for_running_profile(as_admin):
+    with profiling._profile_lock:
+        response = client.get("/", headers={"X-Profile": "1", **_bearer(1)})
+        assert client.get("/debug/profile?seconds=0.1").status_code == 409
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+
+def test_websocket_message_profile(as_admin):
+    token = create_access_token({"sub": "1"})
+
+    with client.websocket_connect(f"/api/v1/ws?token={token}") as websocket:
+        websocket.receive_json()  # connected status
+        websocket.send_json({"type": "ping", "profile": True, "request_id": "p1"})
+
+        assert websocket.receive_json()["type"] == "pong"
+        profile = websocket.receive_json()
+
+    assert profile["type"] == "profile"
+    assert profile["request_id"] == "p1"
+
+
+def test_websocket_message_profile_requires_superuser(as_admin):
+    token = create_access_token({"sub": "2"})
+
+    with client.websocket_connect(f"/api/v1/ws?token={token}") as websocket:
+        websocket.receive_json()  # connected status
+        websocket.send_json({"type": "ping", "profile": True, "request_id": "p2"})
+
+        error = websocket.receive_json()
+        assert websocket.receive_json()["type"] == "pong"
+
+    assert error["code"] == "profile_unavailable"
+    assert error["request_id"] == "p2"
@@ -0,0 +1,127 @@
+"""
+Token verification and verified-token cache tests.
+"""
+
+from datetime import timedelta
+
+from jose import jwt
+
+from app.core.security import (
+    create_access_token,
+    decode_access_token,
+    invalidate_cached_token,
+    token_cache,
+)
+from app.core.revocation import BloomFilter, RevocationList
+from app.core.ttl_cache import TTLCache
+
+
+def _count_jwt_decodes(monkeypatch):
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    return calls
+
+
+def test_decode_access_token_is_cached(monkeypatch):
+    """Repeated decodes of one token verify the signature once."""
+    token_cache.clear()
+    calls = _count_jwt_decodes(monkeypatch)
+    token = create_access_token({"sub": "1"})
+
+    first = decode_access_token(token)
+    second = decode_access_token(token)
+
+    assert first == second
+    assert first["sub"] == "1"
+    assert len(calls) == 1
+
+
+def test_cached_claims_are_copies():
+    """Callers mutating the returned payload do not poison the cache."""
+    token_cache.clear()
+    token = create_access_token({"sub": "2"})
+
+    decode_access_token(token)["sub"] = "tampered"
+
+    assert decode_access_token(token)["sub"] == "2"
+
+
+def test_invalid_token_is_not_cached(monkeypatch):
+    token_cache.clear()
+    calls = _count_jwt_decodes(monkeypatch)
+
+    assert decode_access_token("not-a-jwt") is None
+    assert decode_access_token("not-a-jwt") is None
+    assert len(calls) == 2
+    assert len(token_cache) == 0
+
+
+def test_expired_token_is_rejected():
+    token_cache.clear()
+    token = create_access_token({"sub": "3"}, expires_delta=timedelta(seconds=-1))
+
+    assert decode_access_token(token) is None
+    assert len(token_cache) == 0
+
+
+def test_invalidate_cached_token(monkeypatch):
+    token_cache.clear()
+    calls = _count_jwt_decodes(monkeypatch)
+    token = create_access_token({"sub": "4"})
+
+    decode_access_token(token)
+    invalidate_cached_token(token)
+    decode_access_token(token)
+
+    assert len(calls) == 2
+
+
+def test_ttl_cache_expires_and_evicts():
+    now = [100.0]
+    cache = TTLCache(maxsize=2, clock=lambda: now[0])
+
+    cache.set("a", 1, expires_at=110)
+    cache.set("b", 2, expires_at=200)
+    cache.get("a")
+    cache.set("c", 3, expires_at=200)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] = 110.0
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+
+def test_tokens_carry_unique_jti():
+    first = decode_access_token(create_access_token({"sub": "5"}))
+    second = decode_access_token(create_access_token({"sub": "5"}))
+
+    assert first["jti"] and second["jti"]
+    assert first["jti"] != second["jti"]
+
+
+def test_bloom_filter_membership():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    assert all(f"jti-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_revocation_list_confirms_bloom_positives():
+    revocations = RevocationList()
+    payload = decode_access_token(create_access_token({"sub": "6"}))
+
+    revocations.add_local(payload["jti"], payload["exp"])
+
+    assert revocations.is_revoked(payload["jti"])
+    assert not revocations.is_revoked("some-other-jti")
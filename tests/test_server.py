@@ -0,0 +1,46 @@
+"""
+Production server entry point tests.
+"""
+
+import socket
+
+import pytest
+import uvicorn
+
+from app.__main__ import available_cpus, event_loop_choice, http_choice
+from app.config import settings
+from app.server import DrainingServer, bind_reuseport, max_requests_for_worker, rss_mb
+
+
+def test_workers_share_a_port_with_reuseport():
+    first = bind_reuseport("127.0.0.1", 0, 16)
+    port = first.getsockname()[1]
+    second = bind_reuseport("127.0.0.1", port, 16)
+
+    assert second.getsockname()[1] == port
+    assert second.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT)
+    first.close()
+    second.close()
+
+
+def test_server_choices():
+    assert available_cpus() >= 1
+    assert event_loop_choice() in ("uvloop", "asyncio")
+    assert http_choice() in ("httptools", "h11")
+
+
+def test_max_requests_jitter(monkeypatch):
+    assert max_requests_for_worker() is None
+
+    monkeypatch.setattr(settings, "WORKER_MAX_REQUESTS", 1000)
+    monkeypatch.setattr(settings, "WORKER_MAX_REQUESTS_JITTER", 50)
+
+    assert all(1000 <= max_requests_for_worker() <= 1050 for _ in range(20))
+
+
+@pytest.mark.asyncio
+async def test_memory_limit_stops_worker():
+    config = uvicorn.Config("app.main:app")
+    assert rss_mb() > 1
+
+    assert await DrainingServer(config, memory_limit_mb=1).on_tick(0) is True
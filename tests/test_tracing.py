@@ -0,0 +1,81 @@
+"""
+Tracing tests.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.main import app
+from app.core.security import create_access_token
+from app.core.tracing import MemoryExporter, add_trace_ids, instrument_engine, tracer
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = MemoryExporter()
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    return exporter.spans
+
+
+def test_http_request_span(spans):
+    client.get("/cache-test")
+
+    by_name = {span.name: span for span in spans}
+    root, child = by_name["http.request"], by_name["redis.set"]
+    assert root.parent_id is None
+    assert root.attributes == {"method": "GET", "route": "/cache-test", "status_code": 200}
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+
+
+def test_websocket_message_spans(spans):
+    token = create_access_token({"sub": "1"})
+
+    with client.websocket_connect(f"/api/v1/ws?token={token}") as websocket:
+        websocket.receive_json()  # connected status
+        websocket.send_json({"type": "ping"})
+        websocket.receive_json()
+
+    by_name = {span.name: span for span in spans}
+    message, handler = by_name["ws.message"], by_name["ws.handler"]
+    assert message.attributes["type"] == "ping"
+    assert handler.parent_id == message.span_id
+
+
+def test_database_spans_only_inside_traces(spans):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with tracer.span("job") as root:
+            conn.execute(text("SELECT 2"))
+
+    assert [span.name for span in spans] == ["db.query", "job"]
+    assert spans[0].parent_id == root.span_id
+    assert spans[0].attributes["statement"] == "SELECT 2"
+
+
+def test_unsampled_traces_record_nothing(spans):
+    tracer.sample_rate = 0.0
+
+    with tracer.span("root") as root:
+        with tracer.span("child") as child:
+            pass
+
+    assert not root.sampled and not child.sampled
+    assert not spans
+
+
+def test_trace_ids_added_to_log_lines(spans):
+    assert add_trace_ids(None, "info", {"event": "x"}) == {"event": "x"}
+
+    with tracer.span("root") as span:
+        event = add_trace_ids(None, "info", {"event": "x"})
+
+    assert event["trace_id"] == span.trace_id
+    assert event["span_id"] == span.span_id
@@ -1,15 +1,25 @@
+import asyncio
+
 import pytest
 
-# import asyncio
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.websockets import WebSocketDisconnect
 from app.main import app
+from app.chat.fairness import fair_scheduler
+from app.config import settings
+from app.core.revocation import revocation_list
+from app.core.security import create_access_token, decode_access_token
+from app.websocket import manager, router, topic_namespaces
+
+TOKEN = create_access_token({"sub": "1"})
 
 
 @pytest.mark.asyncio
 async def test_websocket_connection():
     client = TestClient(app)
 
-    with client.websocket_connect("/api/v1/ws?token=test_token") as websocket:
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
         data = websocket.receive_json()
         assert data["type"] == "status"
         assert data["status"] == "connected"
@@ -19,7 +29,8 @@ async def test_websocket_connection():
 async def test_heartbeat():
     client = TestClient(app)
 
-    with client.websocket_connect("/api/v1/ws?token=test_token") as websocket:
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        websocket.receive_json()  # connected status
         websocket.send_json({"type": "heartbeat"})
 
         data = websocket.receive_json()
@@ -30,7 +41,8 @@ async def test_heartbeat():
 async def test_chat_message():
     client = TestClient(app)
 
-    with client.websocket_connect("/api/v1/ws?token=test_token") as websocket:
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        websocket.receive_json()  # connected status
         websocket.send_json(
             {"type": "chat.message", "content": "Hello", "request_id": "test_123"}
         )
@@ -41,3 +53,338 @@ async def test_chat_message():
         response = websocket.receive_json()
         assert response["type"] == "chat.response"
         assert response["request_id"] == "test_123"
+
+
+@pytest.mark.asyncio
+async def test_chat_message_gets_busy_status_when_queues_are_full(monkeypatch):
+    monkeypatch.setattr(fair_scheduler, "running", fair_scheduler.max_concurrency)
+    monkeypatch.setattr(fair_scheduler, "max_queued", 0)
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        websocket.receive_json()  # connected status
+        websocket.send_json(
+            {"type": "chat.message", "content": "Hello", "request_id": "busy_1"}
+        )
+
+        assert websocket.receive_json()["status"] == "processing"
+        busy = websocket.receive_json()
+        assert (busy["status"], busy["request_id"]) == ("busy", "busy_1")
+        assert busy["retry_after"] > 0
+        assert websocket.receive_json()["status"] == "idle"
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_rejected():
+    client = TestClient(app)
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/v1/ws?token=test_token") as websocket:
+            websocket.receive_json()
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_rejected():
+    client = TestClient(app)
+    token = create_access_token({"sub": "2"})
+    payload = decode_access_token(token)  # warm the verified-token cache
+
+    await revocation_list.revoke(payload["jti"], payload["exp"])
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/api/v1/ws?token={token}") as websocket:
+            websocket.receive_json()
+
+
+@pytest.mark.asyncio
+async def test_message_metrics_use_bounded_labels():
+    client = TestClient(app)
+
+    def count(type_, outcome):
+        labels = {"type": type_, "outcome": outcome}
+        return REGISTRY.get_sample_value("ws_messages_total", labels) or 0
+
+    ping_before = count("ping", "ok")
+    unknown_before = count("unknown", "unknown_type")
+
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        websocket.receive_json()  # connected status
+        assert REGISTRY.get_sample_value("ws_connections_active") >= 1
+
+        websocket.send_json({"type": "ping"})
+        assert websocket.receive_json()["type"] == "pong"
+
+        websocket.send_json({"type": "random-type-xyz"})
+        assert websocket.receive_json()["code"] == "unknown_type"
+
+    assert count("ping", "ok") == ping_before + 1
+    assert count("unknown", "unknown_type") == unknown_before + 1
+    assert count("random-type-xyz", "unknown_type") == 0
+    assert REGISTRY.get_sample_value(
+        "ws_frame_size_bytes_count", {"direction": "out"}
+    )
+
+
+@pytest.fixture
+def fresh_manager():
+    # Heartbeat tasks from earlier sessions belong to their (closed) loops
+    manager.heartbeat_task = None
+    return manager
+
+
+@pytest.fixture
+def drained_manager(fresh_manager):
+    yield fresh_manager
+    fresh_manager.draining = False
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_handlers_then_closes(drained_manager, monkeypatch):
+    async def slow(message, websocket, session_id, user_id):
+        await websocket.send_json({"type": "started"})
+        await asyncio.sleep(0.2)
+        await websocket.send_json({"type": "done"})
+
+    monkeypatch.setitem(router.handlers, "slow", slow)
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        websocket.receive_json()  # connected status
+        websocket.send_json({"type": "slow"})
+        assert websocket.receive_json()["type"] == "started"
+
+        websocket.portal.call(drained_manager.drain, 5.0)
+
+        hint = websocket.receive_json()
+        assert hint["status"] == "reconnect"
+        assert (
+            settings.WS_RECONNECT_MIN_SECONDS
+            <= hint["retry_after"]
+            <= settings.WS_RECONNECT_MAX_SECONDS
+        )
+        assert websocket.receive_json()["type"] == "done"
+        closed = websocket.receive()
+        assert closed == {"type": "websocket.close", "code": 1012, "reason": ""}
+
+    assert not drained_manager.connections
+    assert REGISTRY.get_sample_value(
+        "ws_drain_connections_closed_total", {"outcome": "clean"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_draining_rejects_new_connections(drained_manager):
+    drained_manager.draining = True
+
+    with pytest.raises(WebSocketDisconnect):
+        with TestClient(app).websocket_connect(f"/api/v1/ws?token={TOKEN}") as ws:
+            ws.receive_json()
+
+
+class FakeWebSocket:
+    closed = False
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_sweep_reaps_only_silent_sessions(fresh_manager, monkeypatch):
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_TIMEOUT_SECONDS", 60)
+    silent, active = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(silent, "silent-session", 901)
+    await manager.connect(active, "active-session", 902)
+    manager.connections["silent-session"].last_seen -= 120
+    manager.connections["active-session"].last_seen -= 120
+    manager.touch("active-session")
+    sweeps_before = (
+        REGISTRY.get_sample_value("ws_heartbeat_sweep_duration_seconds_count") or 0
+    )
+
+    await manager.check_heartbeats()
+
+    assert silent.closed and not active.closed
+    assert "silent-session" not in manager.connections
+    assert 901 not in manager.user_sessions
+    assert manager.connections["active-session"].messages_received == 1
+    assert (
+        REGISTRY.get_sample_value("ws_heartbeat_sweep_duration_seconds_count")
+        == sweeps_before + 1
+    )
+
+    await manager.disconnect("active-session")
+    assert 902 not in manager.user_sessions
+    await manager.stop_heartbeat()
+
+
+@pytest.mark.asyncio
+async def test_subscribe_and_publish_over_websocket():
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        session_id = websocket.receive_json()["session_id"]
+        websocket.send_json({"type": "subscribe", "topic": "user:1"})
+        assert websocket.receive_json() == {
+            "type": "subscribe.ack",
+            "topic": "user:1",
+            "request_id": None,
+        }
+
+        sent = websocket.portal.call(manager.publish, "user:1", {"type": "doc.saved"})
+        assert sent == 1
+        assert websocket.receive_json() == {"type": "doc.saved"}
+
+        websocket.send_json({"type": "subscribe", "topic": "bad topic!"})
+        assert websocket.receive_json()["code"] == "invalid_topic"
+
+        websocket.send_json({"type": "unsubscribe", "topic": "user:1"})
+        assert websocket.receive_json()["type"] == "unsubscribe.ack"
+        assert "user:1" not in manager.topic_sessions
+        assert manager.connections[session_id].topics == {}
+
+
+@pytest.mark.asyncio
+async def test_subscribe_is_refused_without_access_to_the_topic(monkeypatch):
+    async def member_of_workspace_7(user_id, key):
+        return key == "7"
+
+    monkeypatch.setitem(
+        topic_namespaces.authorizers, "workspace", member_of_workspace_7
+    )
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        session_id = websocket.receive_json()["session_id"]
+        for topic in ("user:2", "doc:42", "workspace:8", "user:"):
+            websocket.send_json(
+                {"type": "subscribe", "topic": topic, "request_id": topic}
+            )
+            error = websocket.receive_json()
+            assert (error["code"], error["request_id"]) == ("forbidden_topic", topic)
+
+        websocket.send_json({"type": "subscribe", "topic": "workspace:7"})
+        assert websocket.receive_json()["type"] == "subscribe.ack"
+        assert manager.connections[session_id].topics == {"workspace:7": "workspace"}
+
+
+async def _any_workspace(user_id, key):
+    return True
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_only_subscribers_and_disconnect_cleans_up(
+    fresh_manager, monkeypatch
+):
+    monkeypatch.setattr(settings, "WS_MAX_TOPICS_PER_CONNECTION", 2)
+    monkeypatch.setitem(topic_namespaces.authorizers, "workspace", _any_workspace)
+    subscribers = {"namespace": "workspace"}
+    before = REGISTRY.get_sample_value("ws_topic_subscribers", subscribers) or 0
+    first, second, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(first, "topic-a", 911)
+    await manager.connect(second, "topic-b", 912)
+    await manager.connect(other, "topic-c", 913)
+    manager.subscribe("topic-a", "workspace:7")
+    manager.subscribe("topic-b", "workspace:7")
+    manager.subscribe("topic-c", "workspace:8")
+
+    assert await manager.publish("workspace:7", {"n": 1}, exclude={"topic-b"}) == 1
+    assert await manager.publish("workspace:7", {"n": 2}) == 2
+    assert first.sent == ['{"n":1}', '{"n":2}']
+    assert second.sent == ['{"n":2}'] and other.sent == []
+    assert REGISTRY.get_sample_value("ws_topic_subscribers", subscribers) == before + 3
+
+    manager.subscribe("topic-a", "workspace:9")
+    assert not manager.subscribe("topic-a", "workspace:10")  # limit of 2
+
+    for session_id in ("topic-a", "topic-b", "topic-c"):
+        await manager.disconnect(session_id)
+    await manager.stop_heartbeat()
+
+    assert not manager.topic_sessions
+    assert await manager.publish("workspace:7", {"n": 3}) == 0
+    assert REGISTRY.get_sample_value("ws_topic_subscribers", subscribers) == before
+
+
+@pytest.mark.asyncio
+async def test_subscriber_gauge_uses_the_namespace_from_subscribe_time(
+    fresh_manager, monkeypatch
+):
+    monkeypatch.setitem(topic_namespaces.authorizers, "workspace", _any_workspace)
+    labels = [{"namespace": "workspace"}, {"namespace": "other"}]
+    before = [REGISTRY.get_sample_value("ws_topic_subscribers", n) or 0 for n in labels]
+    await manager.connect(FakeWebSocket(), "topic-d", 914)
+    manager.subscribe("topic-d", "workspace:1")
+    manager.subscribe("topic-d", "workspace:2")
+
+    # The namespace goes away while subscriptions to it are still open
+    del topic_namespaces.authorizers["workspace"]
+    assert manager.unsubscribe("topic-d", "workspace:1")
+    await manager.disconnect("topic-d")
+    await manager.stop_heartbeat()
+
+    after = [REGISTRY.get_sample_value("ws_topic_subscribers", n) or 0 for n in labels]
+    assert after == before
+
+
+@pytest.mark.asyncio
+async def test_inbound_limits_reject_then_disconnect(monkeypatch):
+    monkeypatch.setattr(settings, "WS_MAX_FRAME_BYTES", 100)
+    monkeypatch.setattr(settings, "WS_MESSAGE_RATES", {"ping": 0.01})
+    monkeypatch.setattr(settings, "WS_MESSAGE_BURST_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "WS_MAX_VIOLATIONS", 3)
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        websocket.receive_json()  # connected status
+        websocket.send_text("x" * 101)
+        assert websocket.receive_json()["code"] == "frame_too_large"
+
+        websocket.send_text("{not json")
+        assert websocket.receive_json()["code"] == "invalid_json"
+
+        websocket.send_json({"type": "ping"})
+        assert websocket.receive_json()["type"] == "pong"
+        websocket.send_json({"type": "ping", "request_id": "r2"})
+        error = websocket.receive_json()
+        assert (error["code"], error["request_id"]) == ("rate_limited", "r2")
+
+        closed = websocket.receive()
+        assert closed["code"] == 1008
+
+    assert REGISTRY.get_sample_value(
+        "ws_limit_violations_total", {"reason": "rate_limited"}
+    )
+    assert REGISTRY.get_sample_value("ws_limit_disconnects_total") >= 1
+
+
+@pytest.mark.asyncio
+async def test_messages_are_handled_in_order_up_to_the_inflight_cap(monkeypatch):
+    async def echo_after(message, websocket, session_id, user_id):
+        await asyncio.sleep(message["delay"])
+        await websocket.send_json({"type": "done", "n": message["n"]})
+
+    monkeypatch.setitem(router.handlers, "work", echo_after)
+    monkeypatch.setattr(settings, "WS_MAX_INFLIGHT_PER_CONNECTION", 2)
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/ws?token={TOKEN}") as websocket:
+        websocket.receive_json()  # connected status
+        # A slow message is not overtaken by a fast one sent after it
+        websocket.send_json({"type": "work", "n": 1, "delay": 0.2})
+        websocket.send_json({"type": "work", "n": 2, "delay": 0})
+        websocket.send_json({"type": "work", "n": 3, "delay": 0, "request_id": "r3"})
+        error = websocket.receive_json()
+        assert (error["code"], error["request_id"]) == ("too_many_inflight", "r3")
+        assert [websocket.receive_json()["n"] for _ in range(2)] == [1, 2]
+
+        websocket.send_json({"type": "ping"})
+        assert websocket.receive_json()["type"] == "pong"